@@ -3,6 +3,7 @@ import streamlit as st
 from pages import investment_simulation, salary_expenses, stock_analysis, budgeting
 from pages import retirement_planning, debt_management, goal_tracking, dashboard, admin, user
 from utils.auth import register, authenticate
+from utils.data_storage import log_activity
 
 def load_css(file_name):
     with open(file_name) as f:
@@ -29,6 +30,10 @@ def main():
 
     if st.session_state.username:
         selection = st.sidebar.radio("Go to", pages[2:])
+        # Every widget interaction reruns the script; log only page changes
+        if st.session_state.get("last_viewed") != (st.session_state.username, selection):
+            st.session_state.last_viewed = (st.session_state.username, selection)
+            log_activity(st.session_state.username, f"Viewed {selection}")
         if selection == "Dashboard":
             dashboard.app()
         elif selection == "Investment Simulation":
@@ -2,8 +2,11 @@
 
 import streamlit as st
 import pandas as pd
+from datetime import datetime, timedelta, timezone
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode
-from utils.data_storage import get_user, get_user_activity
+from utils.data_storage import get_user, get_user_activity_page, activity_writer
+from utils.activity_rollup import rollup_activity, apply_retention, daily_active_users, monthly_active_users, top_activities
+import plotly.graph_objs as go
 
 def create_aggrid_table(data: pd.DataFrame, editable: bool = False, selectable: str = 'single'):
     """
@@ -50,6 +53,76 @@ def display_table(data: pd.DataFrame, title: str = "Interactive Table", editable
     selected_rows = create_aggrid_table(data, editable, selectable)
     st.write("Selected Rows:", selected_rows)
 
+def display_activity_page(username, page_size=50):
+    """
+    Show one page of a user's activity with date filters and Previous/Next buttons.
+
+    Parameters:
+    - username (str): The user whose activity to show.
+    - page_size (int): Rows per page.
+    """
+    columns = st.columns(2)
+    start = columns[0].date_input("From", value=None)
+    end = columns[1].date_input("To", value=None)
+    end = None if end is None else end + timedelta(days=1)
+
+    # Cursors of the pages visited so far, reset when the user or filters change
+    view = (username, start, end)
+    if st.session_state.get("activity_view") != view:
+        st.session_state.activity_view = view
+        st.session_state.activity_cursors = [None]
+    cursors = st.session_state.activity_cursors
+
+    page = get_user_activity_page(username, page_size, cursors[-1], start, end)
+    if page['rows']:
+        st.subheader(f"Activity for {username} (page {len(cursors)})")
+        st.dataframe(pd.DataFrame(page['rows']))
+    else:
+        st.write(f"No activity found for {username}.")
+
+    columns = st.columns(2)
+    if columns[0].button("Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if columns[1].button("Next", disabled=page['next_cursor'] is None):
+        cursors.append(page['next_cursor'])
+        st.rerun()
+
+def display_activity_analytics():
+    """
+    Show active users and top activities from the daily rollups, plus retention controls.
+    """
+    st.header("Activity Analytics")
+    rollup_activity()
+
+    dau = daily_active_users(30)
+    mau = monthly_active_users(12)
+    top = top_activities(30)
+    columns = st.columns(2)
+    # Rollup days are UTC dates, and days or months without activity have no row
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    columns[0].metric("Active Users Today", int(dau.set_index("Day")["Active Users"].get(today, 0)))
+    columns[1].metric("Active Users This Month", int(mau.set_index("Month")["Active Users"].get(today[:7], 0)))
+
+    fig = go.Figure(go.Scatter(x=dau["Day"], y=dau["Active Users"], mode='lines+markers', name="DAU"))
+    fig.update_layout(title="Daily Active Users (30 days)", xaxis_title='Day', yaxis_title='Users')
+    st.plotly_chart(fig)
+
+    fig = go.Figure(go.Bar(x=mau["Month"], y=mau["Active Users"], name="MAU"))
+    fig.update_layout(title="Monthly Active Users", xaxis_title='Month', yaxis_title='Users')
+    st.plotly_chart(fig)
+
+    fig = go.Figure(go.Bar(x=top["Count"], y=top["Activity"], orientation='h'))
+    fig.update_layout(title="Top Activities (30 days)", yaxis=dict(autorange='reversed'))
+    st.plotly_chart(fig)
+
+    st.subheader("Retention")
+    retention_days = st.number_input("Keep raw activity for (days)", min_value=1, value=90)
+    archive = st.checkbox("Archive removed rows", value=True)
+    if st.button("Apply Retention"):
+        removed = apply_retention(retention_days, archive=archive)
+        st.success(f"Removed {removed} raw activity rows older than {retention_days} days.")
+
 def app():
     st.title("Admin Page")
 
@@ -65,15 +138,22 @@ def app():
         selected_user = st.selectbox("Select a user to view activity", user_df['username'].unique())
 
         if selected_user:
-            user_activity = get_user_activity(selected_user)
-            if user_activity:
-                activity_df = pd.DataFrame(user_activity)
-                st.subheader(f"Activity for {selected_user}")
-                st.dataframe(activity_df)
-            else:
-                st.write(f"No activity found for {selected_user}.")
+            display_activity_page(selected_user)
     else:
         st.write("No users found.")
 
+    display_activity_analytics()
+
+    st.header("Activity Logging")
+    stats = activity_writer.stats()
+    columns = st.columns(4)
+    columns[0].metric("Queue Depth", stats["queue_depth"])
+    columns[1].metric("Rows Written", stats["written"])
+    columns[2].metric("Avg Flush (ms)", f"{stats['avg_flush_ms']:.1f}")
+    columns[3].metric("Max Flush (ms)", f"{stats['max_flush_ms']:.1f}")
+    if stats["dropped"] or stats["rejected"] or stats["errors"]:
+        st.warning(f"{stats['dropped']} rows dropped, {stats['rejected']} rows rejected, "
+                   f"{stats['errors']} failed flushes")
+
 if __name__ == "__main__":
     app()
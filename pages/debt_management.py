@@ -4,6 +4,7 @@ import streamlit as st
 import pandas as pd
 from utils.export import export_to_csv
 from utils.pdf_export import export_to_pdf
+from utils.calculations import optimize_debt_payoff, debt_payoff_schedule
 #from openai_integration import get_debt_management_advice
 import plotly.graph_objs as go
 from streamlit_plotly_events import plotly_events
@@ -34,21 +35,33 @@ def app():
         interest_rate = st.number_input(f"Interest Rate of Debt {i+1} (%)", min_value=0.0, step=0.1)
         monthly_payment = st.number_input(f"Monthly Payment for Debt {i+1}", min_value=0.0, step=10.0)
         debts.append({
-            'name': name,
+            'name': name or f"Debt {i+1}",
             'balance': balance,
             'interest_rate': interest_rate,
             'monthly_payment': monthly_payment
         })
 
+    minimum_payments = sum(debt['monthly_payment'] for debt in debts)
+    monthly_budget = st.number_input("Total Monthly Budget for Debt Payments", min_value=0.0, step=50.0, value=minimum_payments)
+
     if st.button("Track Payments"):
         debt_df = pd.DataFrame(debts)
         st.dataframe(debt_df)
 
-        # Debt reduction over time (e.g., snowball method)
-        debt_reduction = pd.DataFrame({
-            'Month': range(1, 25),
-            **{f"Debt {i+1}": [debt['balance'] - (debt['monthly_payment'] * month) for month in range(1, 25)] for i, debt in enumerate(debts)}
-        })
+        try:
+            result = optimize_debt_payoff(debts, monthly_budget)
+        except ValueError as error:
+            st.error(str(error))
+            return
+
+        st.subheader("Payoff Strategies")
+        st.dataframe(result["comparison"])
+        st.write(f"Best strategy: {result['strategy']} - debt free by {result['payoff_date']:%B %Y} "
+                 f"with ${result['total_interest']:,.2f} total interest")
+
+        schedule = debt_payoff_schedule(result["plan"])
+        debt_reduction = pd.DataFrame(schedule["new_balance"], columns=result["plan"]["names"])
+        debt_reduction.insert(0, 'Month', schedule["month"])
         st.dataframe(debt_reduction)
         fig = display_chart(debt_reduction, 'Month', debt_reduction.columns[1:], chart_type='line')
         st.plotly_chart(fig)
@@ -3,6 +3,7 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objs as go
 from streamlit_plotly_events import plotly_events
+from utils.calculations import solve_goals
 
 def display_chart(data, x_column, y_columns, chart_type='bar'):
     fig = go.Figure()
@@ -40,15 +41,20 @@ def app():
         name = st.text_input(f"Name of Goal {i+1}")
         target_amount = st.number_input(f"Target Amount for Goal {i+1}", min_value=0.0, step=1000.0)
         current_amount = st.number_input(f"Current Amount for Goal {i+1}", min_value=0.0, step=100.0)
+        deadline = st.date_input(f"Deadline for Goal {i+1}", value=pd.Timestamp.today() + pd.DateOffset(years=5))
+        expected_return = st.slider(f"Expected Annual Return for Goal {i+1} (%)", 0.0, 15.0, 5.0) / 100
         goals.append({
             'name': name,
             'target_amount': target_amount,
-            'current_amount': current_amount
+            'current_amount': current_amount,
+            'deadline': deadline,
+            'expected_return': expected_return
         })
 
     if st.button("Track Progress"):
         goal_df = pd.DataFrame(goals)
         goal_df['Progress'] = (goal_df['current_amount'] / goal_df['target_amount']) * 100
+        goal_df['Required Monthly Contribution'] = solve_goals(goals)['Required Monthly Contribution'].values
         st.dataframe(goal_df)
 
         fig = display_chart(goal_df, 'name', ['Progress'], chart_type='bar')
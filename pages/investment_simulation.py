@@ -1,9 +1,13 @@
 # pages/investment_simulation.py
 
+import math
 import streamlit as st
 import pandas as pd
 from utils.export import export_to_csv
 from utils.pdf_export import export_to_pdf
+from utils.calculations import simulate_investments_monte_carlo
+from utils.portfolio import price_matrix, return_statistics, random_portfolios, efficient_frontier
+from utils.backtest import REBALANCE_FREQUENCIES, compare_strategies
 #from openai_integration import get_investment_advice
 import plotly.graph_objs as go
 from streamlit_plotly_events import plotly_events
@@ -21,6 +25,84 @@ def display_chart(data, x_column, y_columns, chart_type='line'):
     selected_points = plotly_events(fig, key=f"unique_key_{x_column}_{y_columns}")
     return fig
 
+def display_fan_chart(bands):
+    fig = go.Figure()
+    band_pairs = [("P5", "P95"), ("P25", "P75")]
+    for lower, upper in band_pairs:
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[lower], mode='lines', line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[upper], mode='lines', line=dict(width=0),
+                                 fill='tonexty', name=f"{lower}-{upper}"))
+    fig.add_trace(go.Scatter(x=bands.index, y=bands["P50"], mode='lines', name="Median"))
+    fig.update_layout(xaxis_title='Year', yaxis_title='Portfolio Value')
+    return fig
+
+def display_frontier(frontier, candidates, max_sharpe, min_variance):
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=candidates["Volatility"], y=candidates["Return"], mode='markers',
+                               marker=dict(size=3, color=candidates["Sharpe"], colorscale='Viridis', opacity=0.4),
+                               name="Random Portfolios"))
+    fig.add_trace(go.Scatter(x=frontier["Volatility"], y=frontier["Return"], mode='lines', name="Efficient Frontier"))
+    for label, point in (("Max Sharpe", max_sharpe), ("Min Variance", min_variance)):
+        fig.add_trace(go.Scatter(x=[point["volatility"]], y=[point["return"]], mode='markers',
+                                 marker=dict(size=12, symbol='star'), name=label))
+    fig.update_layout(xaxis_title='Annual Volatility', yaxis_title='Expected Annual Return')
+    return fig
+
+def historical_portfolio_analysis():
+    st.header("Historical Portfolio Analysis")
+    symbols = st.text_input("Stock Symbols (comma separated)", value="AAPL, MSFT, GOOGL, AMZN")
+    risk_free_rate = st.number_input("Risk-Free Rate (%)", min_value=0.0, max_value=20.0, value=2.0) / 100
+    symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()]
+    # The weights cannot sum to 100% if the cap is below an equal split
+    min_weight = max(5, math.ceil(100 / len(symbol_list))) if symbol_list else 5
+    max_weight = st.slider("Maximum Weight per Symbol (%)", min_weight, 100, 100) / 100
+    rebalance = st.selectbox("Rebalancing", REBALANCE_FREQUENCIES, index=REBALANCE_FREQUENCIES.index("quarterly"))
+    threshold = st.slider("Rebalance Only When a Weight Drifts By (%)", 0.0, 20.0, 0.0) / 100
+    cost = st.number_input("Transaction Cost (bps)", min_value=0.0, max_value=200.0, value=10.0) / 10000
+
+    if st.button("Compute Efficient Frontier"):
+        try:
+            prices = price_matrix(symbol_list)
+        except ValueError as e:
+            st.error(f"Error loading price history: {e}")
+            return
+        if len(prices) < 2:
+            st.error("Not enough overlapping price history for these symbols.")
+            return
+
+        statistics = return_statistics(prices, shrinkage=0.1 if len(symbol_list) > 20 else 0.0)
+        candidates = random_portfolios(statistics["mean"], statistics["covariance"],
+                                       risk_free_rate=risk_free_rate, seed=42)["portfolios"]
+        result = efficient_frontier(statistics["mean"], statistics["covariance"],
+                                    max_weight=max_weight, risk_free_rate=risk_free_rate)
+        st.plotly_chart(display_frontier(result["frontier"], candidates, result["max_sharpe"], result["min_variance"]))
+
+        weights = pd.DataFrame({
+            "Max Sharpe": result["max_sharpe"]["weights"],
+            "Min Variance": result["min_variance"]["weights"]
+        })
+        st.write(f"Max Sharpe Portfolio: return {result['max_sharpe']['return']:.1%}, "
+                 f"volatility {result['max_sharpe']['volatility']:.1%}, Sharpe {result['max_sharpe']['sharpe']:.2f}")
+        st.dataframe(weights.style.format("{:.1%}"))
+
+        st.subheader("Backtest")
+        strategy = {"rebalance": rebalance, "threshold": threshold or None}
+        backtests = compare_strategies(prices, {
+            "Max Sharpe": {"weights": result["max_sharpe"]["weights"], **strategy},
+            "Min Variance": {"weights": result["min_variance"]["weights"], **strategy},
+            "Equal Weight": {"weights": dict.fromkeys(prices.columns, 1.0), **strategy},
+        }, cost=cost, risk_free_rate=risk_free_rate)
+        equity = backtests["equity"].rename_axis("Date").reset_index()
+        st.plotly_chart(display_chart(equity, 'Date', list(backtests["equity"].columns)))
+        st.dataframe(backtests["metrics"])
+
+# Assumed correlations between Stocks, Bonds and Mutual Funds
+ASSET_CORRELATION = [
+    [1.0, 0.2, 0.8],
+    [0.2, 1.0, 0.3],
+    [0.8, 0.3, 1.0]
+]
+
 def app():
     st.title("Investment Simulation")
 
@@ -39,16 +121,23 @@ def app():
         "Mutual Funds": st.slider("Percentage of Portfolio in Mutual Funds", 0, 100, 20)
     }
 
+    volatilities = {
+        "Stocks": st.slider("Annual Volatility for Stocks (%)", 0.0, 50.0, 15.0) / 100,
+        "Bonds": st.slider("Annual Volatility for Bonds (%)", 0.0, 30.0, 5.0) / 100,
+        "Mutual Funds": st.slider("Annual Volatility for Mutual Funds (%)", 0.0, 40.0, 10.0) / 100
+    }
+
     total_percentage = sum(portfolio.values())
     portfolio = {k: v / total_percentage for k, v in portfolio.items()}
 
     if st.button("Simulate Investment"):
-        # Simulate investments here and create a DataFrame
-        investment_values = pd.DataFrame({
-            'Year': range(1, years + 1),
-            'Value': [initial_investment * (1 + investment_options['Stocks']) ** i for i in range(years)]
-        })
-        st.plotly_chart(display_chart(investment_values, 'Year', ['Value'], chart_type='line'))
+        simulation = simulate_investments_monte_carlo(
+            initial_investment, investment_options, volatilities, portfolio, years,
+            correlation=ASSET_CORRELATION, seed=42
+        )
+        investment_values = simulation["bands"].reset_index()
+        st.plotly_chart(display_fan_chart(simulation["bands"]))
+        st.write(f"Probability of Loss after {years} years: {simulation['probability_of_loss']:.1%}")
 
         # Display the table
         #display_table(investment_values, title="Investment Simulation Results", editable=False)
@@ -68,5 +157,7 @@ def app():
             export_to_pdf(investment_values, pdf_filename)
             st.success(f"Data exported to {pdf_filename}")
 
+    historical_portfolio_analysis()
+
 if __name__ == "__main__":
     app()
@@ -1,9 +1,11 @@
 # pages/retirement_planning.py
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 from utils.export import export_to_csv
 from utils.pdf_export import export_to_pdf
+from utils.calculations import calculate_retirement_savings, sweep_retirement_scenarios
 #from openai_integration import get_retirement_advice
 import plotly.graph_objs as go
 from streamlit_plotly_events import plotly_events
@@ -31,20 +33,33 @@ def app():
     annual_growth_rate = st.slider("Expected Annual Growth Rate (%)", 0.0, 15.0, 5.0) / 100
 
     if st.button("Calculate Retirement Savings"):
-        future_savings = current_savings * (1 + annual_growth_rate) ** years_to_retirement + annual_contribution * (((1 + annual_growth_rate) ** years_to_retirement - 1) / annual_growth_rate)
+        future_savings = calculate_retirement_savings(current_savings, annual_contribution, years_to_retirement, annual_growth_rate)
         st.write(f"Estimated Savings at Retirement: ${future_savings:,.2f}")
 
     st.header("Simulate Different Retirement Scenarios")
-    growth_rates = [0.03, 0.05, 0.07, 0.1]
+    min_rate, max_rate = st.slider("Growth Rate Range (%)", 0.0, 15.0, (3.0, 10.0))
+    num_rates = st.number_input("Number of Growth Rates", min_value=2, max_value=20, step=1, value=4)
+    growth_rates = np.linspace(min_rate, max_rate, num_rates) / 100
     if st.button("Simulate Scenarios"):
-        scenarios = pd.DataFrame({
-            'Year': range(1, years_to_retirement + 1),
-            **{f"Growth Rate {rate*100}%": [current_savings * (1 + rate) ** i + annual_contribution * (((1 + rate) ** i - 1) / rate) for i in range(years_to_retirement)] for rate in growth_rates}
-        })
+        sweep = sweep_retirement_scenarios(growth_rates, annual_contribution, range(1, years_to_retirement + 1), current_savings)
+        scenarios = sweep.pivot(index='years_to_retirement', columns='annual_growth_rate', values='future_value')
+        scenarios.columns = [f"Growth Rate {rate * 100:.1f}%" for rate in scenarios.columns]
+        scenarios = scenarios.rename_axis('Year').reset_index()
         st.dataframe(scenarios)
         fig = display_chart(scenarios, 'Year', scenarios.columns[1:], chart_type='line')
         st.plotly_chart(fig)
 
+        st.subheader("Savings at Retirement by Growth Rate and Contribution")
+        contributions = np.linspace(0, max(annual_contribution, 1000.0) * 2, 21)
+        grid = sweep_retirement_scenarios(growth_rates, contributions, years_to_retirement, current_savings)
+        heatmap = grid.pivot(index='annual_contribution', columns='annual_growth_rate', values='future_value')
+        st.plotly_chart(go.Figure(data=go.Heatmap(
+            z=heatmap.values,
+            x=[f"{rate * 100:.1f}%" for rate in heatmap.columns],
+            y=heatmap.index,
+            colorbar=dict(title="Savings")
+        )))
+
         # Get AI-driven retirement advice
         #advice = get_retirement_advice(current_savings, annual_contribution, years_to_retirement, annual_growth_rate)
         #st.write("Retirement Advice:", advice)
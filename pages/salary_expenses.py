@@ -3,6 +3,7 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objs as go
 from streamlit_plotly_events import plotly_events
+from utils.plan import build_financial_plan
 
 def display_chart(data, x_column, y_columns, chart_type='line'):
     fig = go.Figure()
@@ -27,24 +28,33 @@ def export_to_pdf(data, filename):
     # Placeholder function for exporting to PDF
     st.success(f"Data exported to {filename}")
 
+def get_financial_plan():
+    # Keep one plan per session so a rerun only recomputes what its inputs changed
+    if "financial_plan" not in st.session_state:
+        st.session_state.financial_plan = build_financial_plan()
+    return st.session_state.financial_plan
+
 def app():
     st.title("Salary and Expenses")
+    plan = get_financial_plan()
 
     salary = st.number_input("Annual Gross Salary", min_value=0.0, step=1000.0)
     deductions = st.number_input("Annual Deductions", min_value=0.0, step=500.0)
-    tax_brackets = [(10000, 0.1), (50000, 0.2), (100000, 0.3), (float('inf'), 0.4)]
+    tax_brackets = [(0, 0.1), (10000, 0.2), (50000, 0.3), (100000, 0.4)]
+    plan.update(salary=salary, deductions=deductions, tax_brackets=tax_brackets)
 
     if salary and deductions:
-        monthly_take_home = salary * (1 - sum(rate for amount, rate in tax_brackets if salary > amount) / 12) - deductions / 12
+        monthly_take_home, _ = plan.get("take_home_pay")
         st.write(f"Monthly Take-Home Pay: ${monthly_take_home:.2f}")
 
     annual_growth_rate = st.slider("Annual Salary Growth Rate (%)", 0.0, 10.0, 3.0) / 100
     forecast_years = st.number_input("Number of Years to Forecast", min_value=1, step=1, value=5)
+    plan.update(salary_growth_rate=annual_growth_rate, years=forecast_years)
 
     if salary and annual_growth_rate and forecast_years:
         projected_salaries = pd.DataFrame({
             'Year': range(1, forecast_years + 1),
-            'Salary': [salary * (1 + annual_growth_rate) ** i for i in range(forecast_years)]
+            'Salary': plan.get("salary_forecast").values
         })
         fig_salary = display_chart(projected_salaries, 'Year', ['Salary'], chart_type='line')
         if fig_salary:
@@ -54,11 +64,11 @@ def app():
     expenses = {category: st.number_input(f"Current {category} Expenses", min_value=0.0, step=100.0, value=1000.0) for category in expense_categories}
     inflation_rates = {category: st.slider(f"Annual Inflation Rate for {category} (%)", 0.0, 10.0, 3.0) / 100 for category in expense_categories}
 
+    plan.update(expenses=expenses, inflation_rates=inflation_rates)
+
     if expenses and inflation_rates:
-        forecasted_expenses = pd.DataFrame({
-            'Year': range(1, forecast_years + 1),
-            **{category: [expenses[category] * (1 + inflation_rates[category]) ** i for i in range(forecast_years)] for category in expense_categories}
-        })
+        forecasted_expenses = plan.get("expense_forecast").copy()
+        forecasted_expenses.insert(0, 'Year', range(1, forecast_years + 1))
         fig_expenses = display_chart(forecasted_expenses, 'Year', expense_categories, chart_type='line')
         if fig_expenses:
             st.plotly_chart(fig_expenses)
@@ -66,6 +76,9 @@ def app():
         # Display the table
         display_table(forecasted_expenses, title="Expense Forecast", editable=False)
 
+        with st.expander("Calculation Timings"):
+            st.dataframe(plan.timing_report())
+
         # Get AI-driven salary advice
         # advice = get_salary_advice(salary, deductions, annual_growth_rate, forecast_years)
         # st.write("Salary Advice:", advice)
@@ -1,7 +1,11 @@
 # pages/stock_analysis.py
 
 import streamlit as st
-from utils.api import get_stock_data, get_company_overview, process_time_series_data
+from utils.async_api import fetch_symbol_data
+from utils.indicators import compute_indicators
+from utils.price_store import get_price_store
+from utils.fundamentals import get_fundamentals_store, OPERATORS
+from utils.symbol_index import search_symbols
 from streamlit_plotly_events import plotly_events
 import plotly.graph_objs as go
 from utils.export import export_to_csv
@@ -24,14 +28,33 @@ def display_chart(data, x_column, y_columns, chart_type='line'):
 def app():
     st.title("Stock Analysis")
 
-    symbol = st.text_input("Enter a stock symbol (e.g., AAPL for Apple):")
+    query = st.text_input("Enter a stock symbol or company name (e.g., AAPL or Apple):")
+    symbol = query.strip()
+    if symbol:
+        matches = search_symbols(symbol)
+        if matches:
+            options = {f"{match['symbol']} - {match['name']}": match["symbol"] for match in matches}
+            # Keep the typed ticker selectable when the index has no exact match for it
+            if symbol.upper() not in options.values():
+                options[f"{symbol.upper()} (as typed)"] = symbol.upper()
+            symbol = options[st.selectbox("Matching Symbols", list(options))]
 
     if symbol:
         with st.spinner("Fetching data..."):
-            stock_data = get_stock_data(symbol)
-            company_overview = get_company_overview(symbol)
+            results = fetch_symbol_data(symbol, endpoints=("history", "overview", "income_statement",
+                                                           "balance_sheet", "cash_flow"))
+            df = results["history"]
+            get_fundamentals_store().merge_payloads(symbol, {
+                "OVERVIEW": results["overview"],
+                "INCOME_STATEMENT": results["income_statement"],
+                "BALANCE_SHEET": results["balance_sheet"],
+                "CASH_FLOW": results["cash_flow"]
+            })
+            company_overview = results["overview"]
+            if isinstance(company_overview, Exception):
+                company_overview = {}
 
-        if "Error Message" in stock_data:
+        if isinstance(df, Exception):
             st.error("Couldn't retrieve data. Please check the stock symbol and try again.")
         else:
             st.success(f"Retrieved data for {symbol}")
@@ -42,17 +65,35 @@ def app():
             st.write(f"Industry: {company_overview.get('Industry')}")
             st.write(f"Description: {company_overview.get('Description')}")
 
-            df = process_time_series_data(stock_data)
             if df is not None:
                 st.subheader("Stock Price Chart")
-                fig = display_chart(df, 'Date', ['Close'], chart_type='line')
+                overlays = st.multiselect("Price Overlays", ["sma:20", "sma:50", "sma:200", "ema:20", "ema:50", "bbands"])
+                oscillators = st.multiselect("Indicators", ["rsi", "macd", "atr", "drawdown", "volatility"])
+                indicators = compute_indicators(df, overlays + oscillators, symbol=symbol, version=get_price_store().version(symbol))
+
+                chart_data = df[['Date', 'Close']].join(indicators.drop(columns='Date'))
+                overlay_columns = [column for column in indicators.columns
+                                   if column.startswith(("SMA", "EMA", "BB"))]
+                fig = display_chart(chart_data, 'Date', ['Close'] + overlay_columns, chart_type='line')
                 st.plotly_chart(fig)
 
+                oscillator_columns = [column for column in indicators.columns[1:] if column not in overlay_columns]
+                if oscillator_columns:
+                    fig_indicators = display_chart(indicators, 'Date', oscillator_columns, chart_type='line')
+                    st.plotly_chart(fig_indicators)
+
                 st.subheader("Recent Stock Data")
-                st.dataframe(df.head())
+                st.dataframe(df.tail())
             else:
                 st.error("Failed to process stock data.")
 
+            st.subheader("Financial Ratios")
+            ratios = get_fundamentals_store().ratios()
+            if symbol.upper() in ratios.index.get_level_values("symbol"):
+                st.dataframe(ratios.loc[symbol.upper()].T)
+            else:
+                st.write("No financial statements available for this symbol.")
+
             # Get AI-driven stock advice
             #advice = get_stock_advice(symbol)
             #st.write("Stock Advice:", advice)
@@ -68,5 +109,25 @@ def app():
                 export_to_pdf(df, pdf_filename)
                 st.success(f"Data exported to {pdf_filename}")
 
+    screener()
+
+def screener():
+    st.header("Stock Screener")
+    latest = get_fundamentals_store().latest_ratios()
+    st.write(f"Screening {len(latest)} stored symbols on their latest annual report.")
+    ratio_names = [column for column in latest.columns if column != "fiscal_date"]
+    if not ratio_names:
+        return
+
+    conditions = []
+    for i in range(st.number_input("Number of Conditions", min_value=0, max_value=10, value=1)):
+        columns = st.columns(3)
+        ratio = columns[0].selectbox("Ratio", ratio_names, key=f"screen_ratio_{i}")
+        op = columns[1].selectbox("Operator", list(OPERATORS), key=f"screen_op_{i}")
+        value = columns[2].number_input("Value", value=0.0, key=f"screen_value_{i}")
+        conditions.append((ratio, op, value))
+    sort_by = st.selectbox("Sort By", ratio_names)
+    st.dataframe(get_fundamentals_store().screen(conditions, sort_by=sort_by, limit=100))
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,59 @@
+# tests/test_debt_payoff.py
+
+import numpy as np
+import pytest
+
+from utils.calculations import plan_debt_payoff
+
+def simulate_monthly(debts, order, extra_payment):
+    """
+    Reference payoff that charges interest and pays every debt one month at a time.
+
+    Freed payments roll to the highest-priority unpaid debt from the following month.
+
+    Returns:
+    - tuple: Total months, payoff month per debt and interest paid per debt.
+    """
+    balance = np.array([debt['balance'] for debt in debts], dtype=float)
+    monthly_rates = np.array([debt['interest_rate'] for debt in debts], dtype=float) / 100 / 12
+    payment = np.array([debt['monthly_payment'] for debt in debts], dtype=float)
+    payment[order[0]] += extra_payment
+    paid = np.zeros(len(debts))
+    payoff_month = np.zeros(len(debts), dtype=int)
+    month = 0
+    while (balance > 0).any():
+        month += 1
+        freed = 0.0
+        for i in np.flatnonzero(balance > 0):
+            owed = balance[i] * (1 + monthly_rates[i])
+            amount = min(payment[i], owed)
+            paid[i] += amount
+            balance[i] = owed - amount
+            if balance[i] <= 1e-6:
+                balance[i] = 0.0
+                payoff_month[i] = month
+                freed += payment[i]
+                payment[i] = 0.0
+        remaining = [i for i in order if balance[i] > 0]
+        if remaining:
+            payment[remaining[0]] += freed
+    return month, payoff_month, paid - np.array([debt['balance'] for debt in debts])
+
+@pytest.mark.parametrize("seed", range(200))
+def test_plan_matches_monthly_simulation(seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(1, 7))
+    debts = [{'name': f"Debt {i}", 'balance': float(rng.uniform(500, 20_000)),
+              'interest_rate': float(rng.uniform(0.0, 30.0)), 'monthly_payment': float(rng.uniform(50, 600))}
+             for i in range(count)]
+    order = rng.permutation(count)
+    extra_payment = float(rng.uniform(0, 500))
+    try:
+        plan = plan_debt_payoff(debts, order=order, extra_payment=extra_payment)
+    except ValueError:
+        pytest.skip("payments never cover interest")
+
+    months, payoff_month, interest = simulate_monthly(debts, order, extra_payment)
+    assert plan["months"] == months
+    np.testing.assert_array_equal(plan["payoff_month"], payoff_month)
+    np.testing.assert_allclose(plan["total_interest"], interest, atol=1e-3)
@@ -0,0 +1,70 @@
+# tests/test_prefetch.py
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from utils.api_cache import ResponseCache
+from utils.prefetch import prefetch
+
+THROTTLE_EVERY = 7
+
+@pytest.fixture
+def stub_api():
+    """
+    Local stand-in for Alpha Vantage that throttles every THROTTLE_EVERY-th call.
+
+    Yields:
+    - tuple: Base URL and the list of received request parameters.
+    """
+    calls = []
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+            with lock:
+                calls.append(params)
+                throttled = len(calls) % THROTTLE_EVERY == 0
+            if throttled:
+                payload = {"Note": "Thank you for using Alpha Vantage! Please slow down."}
+            else:
+                payload = {"Meta Data": {"2. Symbol": params.get("symbol")}, "function": params.get("function")}
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/query", calls
+    server.shutdown()
+    server.server_close()
+
+def test_prefetch_retries_throttling_and_reuses_cache(stub_api, tmp_path):
+    base_url, calls = stub_api
+    symbols = [f"STUB{i}" for i in range(15)]
+    endpoints = ("TIME_SERIES_DAILY", "OVERVIEW")
+    cache = ResponseCache(path=str(tmp_path / "cache.db"))
+
+    with requests.Session() as session:
+        first = prefetch(symbols, endpoints, requests_per_minute=1200, backoff=0.05, base_url=base_url,
+                         api_key="stub", session=session, cache=cache)["summary"]
+        stub_calls = len(calls)
+        second = prefetch(symbols, endpoints, requests_per_minute=1200, backoff=0.05, base_url=base_url,
+                          api_key="stub", session=session, cache=cache)["summary"]
+
+    assert first["fetched"] == 30 and first["failed"] == 0
+    # Every throttled call was retried
+    assert first["requests"] == stub_calls > 30
+    assert second["cached"] == 30 and second["fetched"] == 0
+    assert len(calls) == stub_calls
@@ -1,16 +1,25 @@
 # utils/__init__.py
 
-from .calculations import calculate_take_home_pay, forecast_salary_growth, forecast_expenses
+from .calculations import calculate_take_home_pay, calculate_take_home_pay_batch, compile_tax_brackets
+from .calculations import forecast_salary_growth, forecast_salary_growth_batch, forecast_expenses, project_expenses
 from .visualizations import plot_salary_growth, plot_expenses, plot_investment_simulation
 from .helpers import get_tax_rate, inflation_adjustment
+from .cache import memoize, cache_stats, clear_caches
 
 __all__ = [
     "calculate_take_home_pay",
+    "calculate_take_home_pay_batch",
+    "compile_tax_brackets",
     "forecast_salary_growth",
+    "forecast_salary_growth_batch",
     "forecast_expenses",
+    "project_expenses",
     "plot_salary_growth",
     "plot_expenses",
     "plot_investment_simulation",
     "get_tax_rate",
-    "inflation_adjustment"
+    "inflation_adjustment",
+    "memoize",
+    "cache_stats",
+    "clear_caches"
 ]
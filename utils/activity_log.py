@@ -0,0 +1,203 @@
+# utils/activity_log.py
+
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+INSERT_ACTIVITY = "INSERT INTO user_activity (username, timestamp, activity) VALUES (?, ?, ?)"
+
+class ActivityWriter:
+    """
+    Background writer that batches activity rows into the database.
+
+    log() only puts the row on an in-memory queue. A daemon thread writes queued rows with
+    executemany in a single transaction once batch_size rows are waiting or flush_interval
+    seconds have passed since the oldest one. Remaining rows are written at interpreter
+    exit. When the queue is full, new rows are dropped and counted rather than blocking
+    the caller.
+
+    If a batch fails, its rows are written one at a time so a single bad row cannot hold
+    up the rest: rows the database rejects are dropped and counted, and rows that failed
+    for a transient reason such as a locked database are retried on the next flush, up to
+    max_retries times before they are dropped too.
+
+    Args:
+    - db (ConnectionManager): Database holding the user_activity table.
+    - batch_size (int): Rows that trigger a flush.
+    - flush_interval (float): Most seconds a row waits before it is written.
+    - max_queue (int): Most rows held in memory.
+    - max_retries (int): Failed flushes a row survives before it is dropped.
+    """
+
+    def __init__(self, db, batch_size=500, flush_interval=1.0, max_queue=100_000, max_retries=3):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._retries = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {"logged": 0, "written": 0, "dropped": 0, "rejected": 0, "flushes": 0, "errors": 0,
+                       "last_batch": 0, "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0}
+        atexit.register(self.close)
+
+    def start(self):
+        """
+        Start the writer thread if it is not running.
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+                self._thread.start()
+
+    def log(self, username, activity):
+        """
+        Queue an activity row without waiting for the database.
+
+        Args:
+        - username (str): User the activity belongs to.
+        - activity (str): Description of the activity.
+
+        Returns:
+        - bool: False if the queue was full and the row was dropped.
+        """
+        self.start()
+        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self._queue.put_nowait((username, timestamp, activity))
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("logged")
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Block until every row queued so far has been written.
+
+        Args:
+        - timeout (float, optional): Most seconds to wait.
+
+        Returns:
+        - bool: True if the rows were written within the timeout.
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """
+        Write the remaining rows and stop the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Report queue depth, row counts and flush latency.
+
+        Returns:
+        - dict: Queue depth plus logged, written, dropped, rejected, flush and error counts, the size
+          of the last batch and the last, maximum and average flush time in milliseconds.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["avg_flush_ms"] = stats.pop("total_flush_ms") / stats["flushes"] if stats["flushes"] else 0.0
+        return stats
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _run(self):
+        batch = []
+        waiters = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            stopping = item is None
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if batch and (len(batch) >= self.batch_size or due or waiters or stopping):
+                batch = self._write(batch)
+                deadline = time.monotonic() + self.flush_interval if batch else None
+            if not batch:
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+            if stopping:
+                return
+
+    def _write(self, batch):
+        """
+        Write a batch in one transaction, falling back to row-by-row inserts if it fails.
+
+        Returns:
+        - list: Rows to retry on the next flush; empty once the batch is written or dropped.
+        """
+        start = time.perf_counter()
+        try:
+            self.db.executemany(INSERT_ACTIVITY, batch)
+            written, retry = len(batch), []
+        except sqlite3.Error:
+            self._count("errors")
+            written, retry = self._write_rows(batch)
+        elapsed = (time.perf_counter() - start) * 1000
+        if written:
+            with self._lock:
+                self._stats["written"] += written
+                self._stats["flushes"] += 1
+                self._stats["last_batch"] = written
+                self._stats["last_flush_ms"] = elapsed
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed)
+                self._stats["total_flush_ms"] += elapsed
+
+        if not retry:
+            self._retries = 0
+            return []
+        self._retries += 1
+        if self._retries > self.max_retries:
+            self._count("dropped", len(retry))
+            self._retries = 0
+            return []
+        return retry
+
+    def _write_rows(self, batch):
+        """
+        Insert rows one at a time, dropping rows the database rejects.
+
+        Returns:
+        - tuple: Number of rows written and the rows that hit a transient error.
+        """
+        written = 0
+        retry = []
+        for row in batch:
+            try:
+                self.db.execute(INSERT_ACTIVITY, row)
+                written += 1
+            except sqlite3.OperationalError:
+                # Locked or busy database; the row itself may be fine
+                retry.append(row)
+            except sqlite3.Error:
+                self._count("rejected")
+        return written, retry
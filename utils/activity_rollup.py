@@ -0,0 +1,134 @@
+# utils/activity_rollup.py
+
+import pandas as pd
+
+from utils.data_storage import db
+
+# Each rollup adds the counts of raw rows with id in (?, ?] to its table
+ROLLUPS = [
+    """
+    INSERT INTO activity_daily (day, username, activity, count)
+    SELECT date(timestamp), username, activity, COUNT(*) FROM user_activity
+    WHERE id > ? AND id <= ?
+    GROUP BY date(timestamp), username, activity
+    ON CONFLICT (day, username, activity) DO UPDATE SET count = count + excluded.count
+    """,
+    """
+    INSERT INTO user_daily (day, username, count)
+    SELECT date(timestamp), username, COUNT(*) FROM user_activity
+    WHERE id > ? AND id <= ?
+    GROUP BY date(timestamp), username
+    ON CONFLICT (day, username) DO UPDATE SET count = count + excluded.count
+    """,
+    """
+    INSERT INTO activity_totals (day, activity, count)
+    SELECT date(timestamp), activity, COUNT(*) FROM user_activity
+    WHERE id > ? AND id <= ?
+    GROUP BY date(timestamp), activity
+    ON CONFLICT (day, activity) DO UPDATE SET count = count + excluded.count
+    """,
+]
+
+def rollup_watermark():
+    """
+    Return the id of the last raw activity row included in the rollups.
+    """
+    row = db.query_one("SELECT value FROM activity_rollup_state WHERE name = 'watermark'")
+    return 0 if row is None else row[0]
+
+def rollup_activity(chunk_size=100_000):
+    """
+    Fold raw activity rows added since the last run into the daily rollup tables.
+
+    activity_daily keeps counts per day, user and activity; user_daily and activity_totals
+    are smaller summaries that serve the active-user and top-activity charts.
+
+    Rows are read by id above the watermark, in chunks. Each chunk reads the watermark,
+    adds its counts and stores the new watermark inside one BEGIN IMMEDIATE transaction, so
+    concurrent runs take turns on the write lock and never process the same range twice,
+    and an interrupted run resumes where it stopped.
+
+    Args:
+    - chunk_size (int): Most raw rows aggregated per transaction.
+
+    Returns:
+    - int: Number of raw rows rolled up.
+    """
+    total = 0
+    while True:
+        with db.transaction() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM activity_rollup_state WHERE name = 'watermark'").fetchone()
+            watermark = 0 if row is None else row[0]
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM user_activity").fetchone()[0]
+            if watermark >= last_id:
+                return total
+            upper = min(watermark + chunk_size, last_id)
+            for statement in ROLLUPS:
+                conn.execute(statement, (watermark, upper))
+            total += conn.execute("SELECT COUNT(*) FROM user_activity WHERE id > ? AND id <= ?",
+                                  (watermark, upper)).fetchone()[0]
+            conn.execute("INSERT OR REPLACE INTO activity_rollup_state (name, value) VALUES ('watermark', ?)",
+                         (upper,))
+
+def apply_retention(days=90, archive=False):
+    """
+    Remove raw activity rows older than the retention period.
+
+    Only rows already included in the rollups are removed, so the daily counts stay
+    complete.
+
+    Args:
+    - days (int): Raw rows newer than this many days are kept.
+    - archive (bool): Copy removed rows to user_activity_archive first.
+
+    Returns:
+    - int: Number of raw rows removed.
+    """
+    cutoff = f"-{int(days)} days"
+    condition = "timestamp < datetime('now', ?) AND id <= ?"
+    with db.transaction() as conn:
+        # Read the watermark under the write lock so a concurrent rollup cannot move it
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT value FROM activity_rollup_state WHERE name = 'watermark'").fetchone()
+        watermark = 0 if row is None else row[0]
+        if archive:
+            conn.execute(f"INSERT OR IGNORE INTO user_activity_archive (id, username, timestamp, activity) "
+                         f"SELECT id, username, timestamp, activity FROM user_activity WHERE {condition}",
+                         (cutoff, watermark))
+        return conn.execute(f"DELETE FROM user_activity WHERE {condition}", (cutoff, watermark)).rowcount
+
+def daily_active_users(days=30):
+    """
+    Count distinct active users per day from the rollups.
+
+    Returns:
+    - pd.DataFrame: 'Day' and 'Active Users' for the last days days.
+    """
+    rows = db.query("SELECT day, COUNT(*) FROM user_daily "
+                    "WHERE day >= date('now', ?) GROUP BY day ORDER BY day", (f"-{int(days) - 1} days",))
+    return pd.DataFrame(rows, columns=["Day", "Active Users"])
+
+def monthly_active_users(months=12):
+    """
+    Count distinct active users per calendar month from the rollups.
+
+    Returns:
+    - pd.DataFrame: 'Month' and 'Active Users' for the last months months.
+    """
+    rows = db.query("SELECT substr(day, 1, 7) AS month, COUNT(DISTINCT username) FROM user_daily "
+                    "WHERE day >= date('now', 'start of month', ?) GROUP BY month ORDER BY month",
+                    (f"-{int(months) - 1} months",))
+    return pd.DataFrame(rows, columns=["Month", "Active Users"])
+
+def top_activities(days=30, limit=10):
+    """
+    Rank activities by how often they happened recently, from the rollups.
+
+    Returns:
+    - pd.DataFrame: 'Activity' and 'Count', most frequent first.
+    """
+    rows = db.query("SELECT activity, SUM(count) AS total FROM activity_totals "
+                    "WHERE day >= date('now', ?) GROUP BY activity ORDER BY total DESC LIMIT ?",
+                    (f"-{int(days) - 1} days", limit))
+    return pd.DataFrame(rows, columns=["Activity", "Count"])
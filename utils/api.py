@@ -1,9 +1,63 @@
 # utils/api.py
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 from config import ALPHA_VANTAGE_API_KEY
+from utils.api_cache import ResponseCache
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 BASE_URL = "https://www.alphavantage.co/query"
+REQUEST_TIMEOUT = 30
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_response_cache():
+    """
+    Return the shared response cache, opening its database on first use.
+    """
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+    return _response_cache
+
+def get_session(pool_size=10):
+    """
+    Return the shared HTTP session so requests reuse pooled connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def _query(params, use_cache=True, timeout=REQUEST_TIMEOUT):
+    """
+    Send a request to Alpha Vantage, serving it from the local response cache when possible.
+    """
+    params = {**params, "apikey": ALPHA_VANTAGE_API_KEY}
+
+    def fetch():
+        response = get_session().get(BASE_URL, params=params, timeout=timeout)
+        return response.json()
+
+    if not use_cache:
+        return fetch()
+    return get_response_cache().get_or_fetch(params, fetch)
 
 def get_stock_data(symbol, function="TIME_SERIES_DAILY", outputsize="compact"):
     """
@@ -12,11 +66,9 @@ def get_stock_data(symbol, function="TIME_SERIES_DAILY", outputsize="compact"):
     params = {
         "function": function,
         "symbol": symbol,
-        "apikey": ALPHA_VANTAGE_API_KEY,
         "outputsize": outputsize
     }
-    response = requests.get(BASE_URL, params=params)
-    return response.json()
+    return _query(params)
 
 def get_company_overview(symbol):
     """
@@ -24,11 +76,9 @@ def get_company_overview(symbol):
     """
     params = {
         "function": "OVERVIEW",
-        "symbol": symbol,
-        "apikey": ALPHA_VANTAGE_API_KEY
+        "symbol": symbol
     }
-    response = requests.get(BASE_URL, params=params)
-    return response.json()
+    return _query(params)
 
 def get_income_statement(symbol):
     """
@@ -36,11 +86,9 @@ def get_income_statement(symbol):
     """
     params = {
         "function": "INCOME_STATEMENT",
-        "symbol": symbol,
-        "apikey": ALPHA_VANTAGE_API_KEY
+        "symbol": symbol
     }
-    response = requests.get(BASE_URL, params=params)
-    return response.json()
+    return _query(params)
 
 def get_balance_sheet(symbol):
     """
@@ -48,11 +96,9 @@ def get_balance_sheet(symbol):
     """
     params = {
         "function": "BALANCE_SHEET",
-        "symbol": symbol,
-        "apikey": ALPHA_VANTAGE_API_KEY
+        "symbol": symbol
     }
-    response = requests.get(BASE_URL, params=params)
-    return response.json()
+    return _query(params)
 
 def get_cash_flow(symbol):
     """
@@ -60,11 +106,9 @@ def get_cash_flow(symbol):
     """
     params = {
         "function": "CASH_FLOW",
-        "symbol": symbol,
-        "apikey": ALPHA_VANTAGE_API_KEY
+        "symbol": symbol
     }
-    response = requests.get(BASE_URL, params=params)
-    return response.json()
+    return _query(params)
 
 def search_symbol(keywords):
     """
@@ -72,24 +116,103 @@ def search_symbol(keywords):
     """
     params = {
         "function": "SYMBOL_SEARCH",
-        "keywords": keywords,
-        "apikey": ALPHA_VANTAGE_API_KEY
+        "keywords": keywords
     }
-    response = requests.get(BASE_URL, params=params)
-    return response.json()
+    return _query(params)
 
-def process_time_series_data(data):
+# Column names for the numbered fields of Alpha Vantage time series rows
+SERIES_FIELDS = {
+    "open": ("Open", np.float64),
+    "high": ("High", np.float64),
+    "low": ("Low", np.float64),
+    "close": ("Close", np.float64),
+    "adjusted close": ("Adjusted Close", np.float64),
+    "volume": ("Volume", np.int64),
+    "dividend amount": ("Dividend Amount", np.float64),
+    "split coefficient": ("Split Coefficient", np.float64),
+}
+
+def find_time_series_key(data):
+    """
+    Find the key holding the bars of any daily, intraday, weekly or monthly series payload.
+    """
+    return next((key for key in data if "Time Series" in key), None)
+
+def _series_columns(dates, fields, values):
+    """
+    Build typed, date-sorted columns from parsed time series values.
+
+    Args:
+    - dates (list of str): Bar timestamps.
+    - fields (list of str): Raw field names such as '1. open'.
+    - values (dict): Raw string values by raw field name, aligned with dates.
+
+    Returns:
+    - dict: 'Date' as datetime64 plus one typed NumPy array per field, oldest bar first.
+    """
+    columns = {"Date": np.array(dates, dtype="datetime64[ns]")}
+    for field in fields:
+        name, dtype = SERIES_FIELDS.get(field.split(". ", 1)[-1], (field, np.float64))
+        raw = values[field]
+        if dtype is np.int64:
+            columns[name] = np.array(raw, dtype=np.float64).astype(np.int64)
+        else:
+            columns[name] = np.array(raw, dtype=np.float64)
+
+    dates = columns["Date"]
+    if dates.size > 1:
+        if dates[0] > dates[-1] and np.all(dates[:-1] > dates[1:]):
+            order = slice(None, None, -1)
+        else:
+            order = np.argsort(dates, kind="stable")
+        columns = {name: column[order] for name, column in columns.items()}
+    return columns
+
+def process_time_series_data(data, as_arrays=False):
     """
     Process time series data and return a pandas DataFrame.
+
+    Works for daily, intraday, weekly, monthly and adjusted series. Columns are typed
+    (datetime64 dates, float64 prices, int64 volume) and rows run from oldest to newest.
     """
-    time_series = data.get("Time Series (Daily)")
+    series_key = find_time_series_key(data)
+    time_series = data.get(series_key) if series_key else None
     if not time_series:
         return None
 
-    df = pd.DataFrame.from_dict(time_series, orient="index")
-    df.index = pd.to_datetime(df.index)
-    df = df.astype(float)
-    df.columns = ["Open", "High", "Low", "Close", "Volume"]
-    df.reset_index(inplace=True)
-    df.rename(columns={"index": "Date"}, inplace=True)
-    return df.sort_index()
\ No newline at end of file
+    dates = list(time_series)
+    rows = list(time_series.values())
+    fields = list(rows[0])
+    values = {field: [row[field] for row in rows] for field in fields}
+    columns = _series_columns(dates, fields, values)
+    return columns if as_arrays else pd.DataFrame(columns)
+
+def parse_time_series_stream(stream, as_arrays=False):
+    """
+    Stream-parse a time series JSON payload without loading the whole document.
+
+    Requires the optional ijson package. Accepts a binary file-like object, such as
+    the raw body of a streamed response.
+    """
+    if ijson is None:
+        raise ImportError("parse_time_series_stream requires the ijson package")
+
+    dates, fields, values = [], [], {}
+    for prefix, event, value in ijson.parse(stream):
+        if event != "string" or "Time Series" not in prefix:
+            continue
+        parts = prefix.split(".", 2)
+        if len(parts) != 3:
+            continue
+        _, date, field = parts
+        if not dates or dates[-1] != date:
+            dates.append(date)
+        if field not in values:
+            fields.append(field)
+            values[field] = []
+        values[field].append(value)
+
+    if not dates:
+        return None
+    columns = _series_columns(dates, fields, values)
+    return columns if as_arrays else pd.DataFrame(columns)
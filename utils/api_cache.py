@@ -0,0 +1,294 @@
+# utils/api_cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_PATH = 'data/api_cache.db'
+
+# Seconds a response stays fresh, by Alpha Vantage function
+ENDPOINT_TTLS = {
+    "TIME_SERIES_INTRADAY": 5 * 60,
+    "TIME_SERIES_DAILY": 6 * 3600,
+    "TIME_SERIES_DAILY_ADJUSTED": 6 * 3600,
+    "TIME_SERIES_WEEKLY": 24 * 3600,
+    "TIME_SERIES_WEEKLY_ADJUSTED": 24 * 3600,
+    "TIME_SERIES_MONTHLY": 24 * 3600,
+    "TIME_SERIES_MONTHLY_ADJUSTED": 24 * 3600,
+    "OVERVIEW": 7 * 24 * 3600,
+    "INCOME_STATEMENT": 7 * 24 * 3600,
+    "BALANCE_SHEET": 7 * 24 * 3600,
+    "CASH_FLOW": 7 * 24 * 3600,
+    "SYMBOL_SEARCH": 30 * 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+# Keys Alpha Vantage uses for errors and throttling instead of data
+ERROR_KEYS = ("Error Message", "Note", "Information")
+
+def is_error_response(payload):
+    """
+    Check whether an Alpha Vantage payload is an error or throttling message.
+
+    Args:
+    - payload (dict): Decoded JSON response.
+
+    Returns:
+    - bool: True if the payload carries no data.
+    """
+    return not payload or (isinstance(payload, dict) and any(key in payload for key in ERROR_KEYS))
+
+def cache_key(params):
+    """
+    Build a cache key from request parameters, ignoring the API key.
+
+    Args:
+    - params (dict): Request parameters including 'function'.
+
+    Returns:
+    - str: Canonical JSON of the parameters.
+    """
+    return json.dumps({k: v for k, v in params.items() if k != "apikey"}, sort_keys=True, default=str)
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of API responses with per-endpoint TTLs.
+
+    Fresh entries are returned directly. Entries past their TTL but within the stale
+    window are returned immediately while a background thread refreshes them. The cache
+    is kept under max_bytes by evicting the least recently used entries. Access times of
+    hits are kept in memory and written in batches, before every eviction check and once
+    access_batch of them are pending, so a hit does not cost a write.
+
+    Args:
+    - path (str): SQLite database file.
+    - ttls (dict, optional): Fresh seconds by function name, defaulting to ENDPOINT_TTLS.
+    - stale_factor (float): Entries up to stale_factor x TTL old are served stale.
+    - max_bytes (int): Maximum total size of cached payloads.
+    - access_batch (int): Pending access times that trigger a write.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttls=None, stale_factor=4.0, max_bytes=200 * 1024 ** 2, access_batch=100):
+        self.path = path
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.stale_factor = stale_factor
+        self.max_bytes = max_bytes
+        self.access_batch = access_batch
+        self._lock = threading.Lock()
+        self._accessed = {}
+        self._refreshing = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0, "errors": 0}
+        self._create_table()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _create_table(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS api_responses (
+                key TEXT PRIMARY KEY,
+                function TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_api_responses_last_access ON api_responses (last_access)")
+        conn.commit()
+        conn.close()
+
+    def ttl(self, function):
+        """
+        Fresh lifetime in seconds for a function.
+        """
+        return self.ttls.get(function, DEFAULT_TTL)
+
+    def is_fresh(self, params):
+        """
+        Check whether a response for the parameters is cached and within its TTL.
+
+        Args:
+        - params (dict): Request parameters including 'function'.
+
+        Returns:
+        - bool: True if a fresh response is cached.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT fetched_at FROM api_responses WHERE key = ?", (cache_key(params),)).fetchone()
+        conn.close()
+        return row is not None and time.time() - row[0] <= self.ttl(params.get("function", ""))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_or_fetch(self, params, fetch):
+        """
+        Return a cached response, fetching and storing it when missing or expired.
+
+        Args:
+        - params (dict): Request parameters including 'function'.
+        - fetch (callable): Called without arguments to fetch the decoded response.
+
+        Returns:
+        - dict: The response payload.
+        """
+        key = cache_key(params)
+        function = params.get("function", "")
+        now = time.time()
+
+        conn = self._connect()
+        row = conn.execute("SELECT payload, fetched_at FROM api_responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            with self._lock:
+                self._accessed[key] = now
+                pending = len(self._accessed)
+            if pending >= self.access_batch:
+                self._write_access_times(conn)
+        conn.close()
+
+        if row is not None:
+            payload, fetched_at = row
+            age = now - fetched_at
+            if age <= self.ttl(function):
+                self._count("hits")
+                return json.loads(payload)
+            if age <= self.ttl(function) * self.stale_factor:
+                self._count("stale_hits")
+                self._refresh_in_background(key, function, fetch)
+                return json.loads(payload)
+
+        self._count("misses")
+        return self._fetch_and_store(key, function, fetch)
+
+    def _fetch_and_store(self, key, function, fetch):
+        payload = fetch()
+        if is_error_response(payload):
+            self._count("errors")
+            return payload
+        self.put(key, function, payload)
+        return payload
+
+    def _refresh_in_background(self, key, function, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch_and_store(key, function, fetch)
+                self._count("refreshes")
+            except Exception:
+                self._count("errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def store(self, params, payload):
+        """
+        Store a response for request parameters.
+
+        Args:
+        - params (dict): Request parameters including 'function'.
+        - payload (dict): Decoded response.
+        """
+        self.put(cache_key(params), params.get("function", ""), payload)
+
+    def put(self, key, function, payload):
+        """
+        Store a response and evict old entries if the cache is over its size limit.
+
+        Args:
+        - key (str): Cache key from cache_key.
+        - function (str): Alpha Vantage function name.
+        - payload (dict): Decoded response.
+        """
+        text = json.dumps(payload)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO api_responses (key, function, payload, fetched_at, last_access, size) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, function, text, now, now, len(text.encode()))
+        )
+        conn.commit()
+        self._write_access_times(conn)
+        self._evict(conn)
+        conn.close()
+
+    def _write_access_times(self, conn):
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            conn.executemany("UPDATE api_responses SET last_access = ? WHERE key = ?",
+                             [(when, key) for key, when in accessed.items()])
+            conn.commit()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM api_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM api_responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM api_responses WHERE key = ?", victims)
+        conn.commit()
+        with self._lock:
+            self.stats["evictions"] += len(victims)
+
+    def payloads(self, function):
+        """
+        Yield every cached payload for a function, without touching access times.
+
+        Args:
+        - function (str): Alpha Vantage function name.
+
+        Returns:
+        - generator: Decoded payloads.
+        """
+        conn = self._connect()
+        rows = conn.execute("SELECT payload FROM api_responses WHERE function = ?", (function,)).fetchall()
+        conn.close()
+        for (payload,) in rows:
+            yield json.loads(payload)
+
+    def invalidate(self, function=None):
+        """
+        Drop cached responses, for one function or all of them.
+
+        Args:
+        - function (str, optional): Alpha Vantage function name.
+        """
+        conn = self._connect()
+        if function is None:
+            conn.execute("DELETE FROM api_responses")
+        else:
+            conn.execute("DELETE FROM api_responses WHERE function = ?", (function,))
+        conn.commit()
+        conn.close()
+
+    def cache_info(self):
+        """
+        Report counters and the current size of the cache.
+
+        Returns:
+        - dict: Hit, stale hit, miss, refresh, eviction and error counts plus entry count and bytes.
+        """
+        conn = self._connect()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM api_responses").fetchone()
+        conn.close()
+        with self._lock:
+            return {**self.stats, "entries": entries, "bytes": size}
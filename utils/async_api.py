@@ -0,0 +1,120 @@
+# utils/async_api.py
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api import (
+    get_stock_data,
+    get_company_overview,
+    get_income_statement,
+    get_balance_sheet,
+    get_cash_flow,
+    search_symbol,
+)
+from utils.price_store import get_price_history
+
+# Requests run on this pool, sized like the shared HTTP connection pool
+_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="alpha-vantage")
+
+DEFAULT_TIMEOUT = 30
+
+async def _run(func, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Run a synchronous utils.api function without blocking the event loop.
+
+    The call goes through the shared session and response cache. On timeout or
+    cancellation the awaiting task stops at once; the underlying request is bounded by
+    the HTTP timeout.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await asyncio.wait_for(loop.run_in_executor(_executor, call), timeout)
+
+async def get_stock_data_async(symbol, function="TIME_SERIES_DAILY", outputsize="compact", timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch stock data from Alpha Vantage API without blocking the event loop.
+    """
+    return await _run(get_stock_data, symbol, function=function, outputsize=outputsize, timeout=timeout)
+
+async def get_company_overview_async(symbol, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch company overview data from Alpha Vantage API without blocking the event loop.
+    """
+    return await _run(get_company_overview, symbol, timeout=timeout)
+
+async def get_income_statement_async(symbol, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch income statement data from Alpha Vantage API without blocking the event loop.
+    """
+    return await _run(get_income_statement, symbol, timeout=timeout)
+
+async def get_balance_sheet_async(symbol, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch balance sheet data from Alpha Vantage API without blocking the event loop.
+    """
+    return await _run(get_balance_sheet, symbol, timeout=timeout)
+
+async def get_cash_flow_async(symbol, timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch cash flow data from Alpha Vantage API without blocking the event loop.
+    """
+    return await _run(get_cash_flow, symbol, timeout=timeout)
+
+async def search_symbol_async(keywords, timeout=DEFAULT_TIMEOUT):
+    """
+    Search for stock symbols using Alpha Vantage API without blocking the event loop.
+    """
+    return await _run(search_symbol, keywords, timeout=timeout)
+
+async def get_price_history_async(symbol, function="TIME_SERIES_DAILY", timeout=DEFAULT_TIMEOUT):
+    """
+    Read a symbol's price history from the local store, syncing it when stale, without blocking the event loop.
+    """
+    return await _run(get_price_history, symbol, function=function, timeout=timeout)
+
+SYMBOL_ENDPOINTS = {
+    "history": get_price_history_async,
+    "time_series": get_stock_data_async,
+    "overview": get_company_overview_async,
+    "income_statement": get_income_statement_async,
+    "balance_sheet": get_balance_sheet_async,
+    "cash_flow": get_cash_flow_async,
+}
+
+async def gather_symbol_data(symbol, endpoints=tuple(SYMBOL_ENDPOINTS), timeout=DEFAULT_TIMEOUT):
+    """
+    Fetch several endpoints for one symbol concurrently.
+
+    Args:
+    - symbol (str): Stock symbol.
+    - endpoints (list of str): Keys of SYMBOL_ENDPOINTS to fetch.
+    - timeout (float): Seconds allowed for the whole fan-out; unfinished calls are cancelled.
+
+    Returns:
+    - dict: Payload by endpoint, or the exception raised for that endpoint.
+    """
+    tasks = {endpoint: asyncio.ensure_future(SYMBOL_ENDPOINTS[endpoint](symbol, timeout=timeout))
+             for endpoint in endpoints}
+    done, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+    results = {}
+    for endpoint, task in tasks.items():
+        if task in pending:
+            results[endpoint] = asyncio.TimeoutError(f"{endpoint} for {symbol} timed out")
+        elif task.exception() is not None:
+            results[endpoint] = task.exception()
+        else:
+            results[endpoint] = task.result()
+    return results
+
+def fetch_symbol_data(symbol, endpoints=tuple(SYMBOL_ENDPOINTS), timeout=DEFAULT_TIMEOUT):
+    """
+    Synchronous entry point for gather_symbol_data, for Streamlit pages and scripts.
+
+    Returns:
+    - dict: Payload by endpoint, or the exception raised for that endpoint.
+    """
+    return asyncio.run(gather_symbol_data(symbol, endpoints, timeout))
@@ -1,21 +1,26 @@
 # utils/auth.py
 import streamlit as st
 import streamlit_authenticator as stauth
-from utils.data_storage import get_user, save_user, create_table, hash_password
+from utils.data_storage import save_user, get_user_by_username, credential_provider
 
-def authenticate():
-    create_table()
-    users = get_user()
-    usernames = [user['username'] for user in users]
-    names = [user['name'] for user in users]
-    hashed_passwords = [user['password'] for user in users]
+def get_authenticator():
+    # Built once per session; its credentials look users up as they log in, so saved
+    # users are picked up without a rebuild
+    if "authenticator" not in st.session_state:
+        authenticator = stauth.Authenticate(
+            credentials={"usernames": {}},
+            cookie_name="financial_planner",
+            key="abcdef",
+            cookie_expiry_days=30
+        )
+        # Authenticate copies the usernames it is given into a plain dict, which would
+        # load every user; hand it the lazy per-session view afterwards instead
+        authenticator.credentials = credential_provider.credentials()
+        st.session_state.authenticator = authenticator
+    return st.session_state.authenticator
 
-    authenticator = stauth.Authenticate(
-        credentials={"usernames": dict(zip(usernames, [{"name": name, "password": password} for name, password in zip(names, hashed_passwords)]))},
-        cookie_name="financial_planner",
-        key="abcdef",
-        cookie_expiry_days=30
-    )
+def authenticate():
+    authenticator = get_authenticator()
 
     name, authentication_status, username = authenticator.login("Login", "sidebar")
 
@@ -37,7 +42,7 @@ def register():
     name = st.sidebar.text_input("Name")
     if st.sidebar.button("Register"):
         if new_username and new_password and name:
-            save_user(name, new_username, hash_password(new_password))
+            save_user(name, new_username, new_password)
             st.sidebar.success("User registered successfully!")
         else:
             st.sidebar.error("Please fill in all fields.")
@@ -49,15 +54,11 @@ def reset_password():
     new_password = st.text_input("New Password", type='password')
     if st.button("Reset Password"):
         if username and new_password:
-            users = get_user()
-            user_exists = any(user['username'] == username for user in users)
-            if user_exists:
-                save_user(username, hash_password(new_password))
+            user = get_user_by_username(username)
+            if user is not None:
+                save_user(user['name'], username, new_password)
                 st.success("Password reset successfully!")
             else:
                 st.error("Username does not exist.")
         else:
             st.error("Please fill in all fields.")
-
-# Ensure tables are created
-create_table()
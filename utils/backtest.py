@@ -0,0 +1,190 @@
+# utils/backtest.py
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import drawdown
+
+TRADING_DAYS = 252
+
+REBALANCE_FREQUENCIES = ("never", "daily", "weekly", "monthly", "quarterly", "annual")
+
+def rebalance_candidates(dates, frequency="monthly"):
+    """
+    Mark the last trading day of each period, when a rebalance may happen.
+
+    Args:
+    - dates (pd.DatetimeIndex): Trading dates, oldest first.
+    - frequency (str): One of REBALANCE_FREQUENCIES.
+
+    Returns:
+    - np.ndarray: Boolean mask over dates. The first and last dates are never marked.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if frequency not in REBALANCE_FREQUENCIES:
+        raise ValueError(f"Unknown rebalance frequency: {frequency}. Use one of {', '.join(REBALANCE_FREQUENCIES)}.")
+    if frequency == "never":
+        return np.zeros(len(dates), dtype=bool)
+    if frequency == "daily":
+        period = np.arange(len(dates))
+    elif frequency == "weekly":
+        period = (dates - pd.to_timedelta(dates.dayofweek, unit="D")).normalize().asi8
+    elif frequency == "monthly":
+        period = dates.year * 12 + dates.month
+    elif frequency == "quarterly":
+        period = dates.year * 4 + dates.quarter
+    else:
+        period = np.asarray(dates.year)
+    period = np.asarray(period)
+    mask = np.zeros(len(dates), dtype=bool)
+    mask[1:-1] = period[1:-1] != period[2:]
+    return mask
+
+def _drift(prices, weights, start, stop):
+    """
+    Weights drifted from a rebalance at row start, for rows start+1 .. stop-1.
+
+    Returns:
+    - tuple: (growth of the portfolio since start, drifted weights).
+    """
+    holdings = prices[start + 1:stop] / prices[start] * weights
+    growth = holdings.sum(axis=1)
+    return growth, holdings / growth[:, None]
+
+def _threshold_rebalances(prices, weights, candidates, threshold):
+    """
+    Find rebalance rows where, at a candidate row, any weight has drifted more than threshold.
+
+    Loops over rebalance events, not days: the drift after each rebalance is computed for a
+    window of rows at once and the first crossing is found with argmax.
+    """
+    n_rows = len(prices)
+    rebalances = []
+    start = 0
+    window = TRADING_DAYS
+    while start < n_rows - 1:
+        stop = min(start + 1 + window, n_rows)
+        _, drifted = _drift(prices, weights, start, stop)
+        crossed = (np.abs(drifted - weights).max(axis=1) > threshold) & candidates[start + 1:stop]
+        if crossed.any():
+            start = start + 1 + int(np.argmax(crossed))
+            rebalances.append(start)
+            window = TRADING_DAYS
+        elif stop == n_rows:
+            break
+        else:
+            window *= 2
+    return np.array(rebalances, dtype=int)
+
+def backtest(prices, weights, rebalance="monthly", threshold=None, cost=0.001, initial_value=10000.0):
+    """
+    Replay a constant-mix allocation over historical prices.
+
+    The portfolio is bought at the first close. Between rebalances each holding drifts
+    with its own price. A rebalance restores the target weights at the close of a
+    candidate day, and the traded value is charged the transaction cost. With a
+    threshold, a candidate day triggers a rebalance only if some weight has drifted by
+    more than the threshold.
+
+    Args:
+    - prices (pd.DataFrame): Date x symbol price matrix, e.g. from utils.portfolio.price_matrix.
+    - weights (dict or pd.Series): Target weight by symbol; normalized to sum to 1.
+    - rebalance (str): Candidate frequency, one of REBALANCE_FREQUENCIES.
+    - threshold (float, optional): Drift in absolute weight that triggers a rebalance.
+    - cost (float): Transaction cost as a fraction of traded value.
+    - initial_value (float): Starting portfolio value.
+
+    Returns:
+    - dict: 'equity' Series indexed by date, 'rebalance_dates' DatetimeIndex,
+      'turnover' (total traded fraction of value) and 'costs' (total cost paid).
+    """
+    weights = pd.Series(weights, dtype=float).reindex(prices.columns, fill_value=0.0)
+    weights = weights.to_numpy() / weights.sum()
+    values = prices.to_numpy(dtype=float)
+    candidates = rebalance_candidates(prices.index, rebalance)
+
+    if threshold is None:
+        rebalances = np.flatnonzero(candidates)
+    else:
+        rebalances = _threshold_rebalances(values, weights, candidates, threshold)
+
+    # Row of the last rebalance strictly before each row; row 0 is the initial purchase
+    starts = np.concatenate([[0], rebalances])
+    segment = np.searchsorted(starts, np.arange(len(values)), side="left") - 1
+    segment[0] = 0
+    anchor = starts[segment]
+    growth = (values / values[anchor]) @ weights
+
+    # Traded fraction at each rebalance, from the drifted weights back to the targets
+    drifted = values[rebalances] / values[anchor[rebalances]] * weights / growth[rebalances, None]
+    turnover = np.abs(drifted - weights).sum(axis=1)
+    multipliers = growth[rebalances] * (1 - cost * turnover)
+    start_values = initial_value * np.concatenate([[1.0], np.cumprod(multipliers)])
+
+    equity = start_values[segment] * growth
+    equity[rebalances] *= 1 - cost * turnover
+    traded_value = start_values[:-1] * growth[rebalances] * turnover
+    return {
+        "equity": pd.Series(equity, index=prices.index),
+        "rebalance_dates": prices.index[rebalances],
+        "turnover": float(turnover.sum()),
+        "costs": float((traded_value * cost).sum()),
+    }
+
+def performance_metrics(equity, periods_per_year=TRADING_DAYS, risk_free_rate=0.0):
+    """
+    Summarize an equity curve.
+
+    Args:
+    - equity (pd.Series): Portfolio value indexed by date.
+    - periods_per_year (int): Return periods per year, for annualizing.
+    - risk_free_rate (float): Annual risk-free rate for the Sharpe ratio.
+
+    Returns:
+    - dict: 'Final Value', 'Total Return', 'CAGR', 'Volatility', 'Sharpe' and 'Max Drawdown'.
+    """
+    values = equity.to_numpy(dtype=float)
+    years = (equity.index[-1] - equity.index[0]).days / 365.25
+    total_return = values[-1] / values[0] - 1
+    returns = values[1:] / values[:-1] - 1
+    volatility = returns.std(ddof=1) * np.sqrt(periods_per_year) if len(returns) > 1 else 0.0
+    annual_return = returns.mean() * periods_per_year if len(returns) else 0.0
+    return {
+        "Final Value": values[-1],
+        "Total Return": total_return,
+        "CAGR": (values[-1] / values[0]) ** (1 / years) - 1 if years > 0 else 0.0,
+        "Volatility": volatility,
+        "Sharpe": (annual_return - risk_free_rate) / volatility if volatility > 0 else np.nan,
+        "Max Drawdown": float(drawdown(equity).min()),
+    }
+
+def compare_strategies(prices, strategies, cost=0.001, initial_value=10000.0, risk_free_rate=0.0):
+    """
+    Backtest several strategies over the same prices.
+
+    Args:
+    - prices (pd.DataFrame): Date x symbol price matrix.
+    - strategies (dict): Strategy name to a dict with 'weights' and optionally
+      'rebalance', 'threshold' and 'cost', as accepted by backtest.
+    - cost (float): Default transaction cost as a fraction of traded value.
+    - initial_value (float): Starting portfolio value.
+    - risk_free_rate (float): Annual risk-free rate for the Sharpe ratio.
+
+    Returns:
+    - dict: 'equity' DataFrame with one column per strategy and 'metrics' DataFrame with one
+      row per strategy, including rebalance count, turnover and costs.
+    """
+    equity = {}
+    metrics = {}
+    for name, strategy in strategies.items():
+        result = backtest(prices, strategy["weights"], rebalance=strategy.get("rebalance", "monthly"),
+                          threshold=strategy.get("threshold"), cost=strategy.get("cost", cost),
+                          initial_value=initial_value)
+        equity[name] = result["equity"]
+        metrics[name] = {
+            **performance_metrics(result["equity"], risk_free_rate=risk_free_rate),
+            "Rebalances": len(result["rebalance_dates"]),
+            "Turnover": result["turnover"],
+            "Costs": result["costs"],
+        }
+    return {"equity": pd.DataFrame(equity), "metrics": pd.DataFrame(metrics).T}
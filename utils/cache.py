@@ -0,0 +1,251 @@
+# utils/cache.py
+
+import copy
+import functools
+import hashlib
+import inspect
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_PRIMITIVES = (type(None), bool, int, float, complex, str, bytes)
+
+def _update_hash(digest, value):
+    """
+    Feed a value into a hash in a canonical, type-tagged form.
+
+    Args:
+    - digest: hashlib hash object to update.
+    - value: Value to hash. Dicts, lists, tuples, sets, NumPy arrays and pandas objects
+      are hashed by content; other objects fall back to pickle, then repr.
+    """
+    digest.update(type(value).__name__.encode())
+    if isinstance(value, _PRIMITIVES):
+        digest.update(repr(value).encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype.str}{value.shape}".encode())
+        if value.dtype.hasobject:
+            for item in value.ravel():
+                _update_hash(digest, item)
+        else:
+            digest.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, np.generic):
+        digest.update(value.dtype.str.encode())
+        digest.update(value.tobytes())
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        _update_hash(digest, value.index.tolist())
+        if isinstance(value, pd.DataFrame):
+            _update_hash(digest, value.columns.tolist())
+            _update_hash(digest, [str(dtype) for dtype in value.dtypes])
+        else:
+            _update_hash(digest, (value.name, str(value.dtype)))
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().data)
+        except TypeError:
+            _update_hash(digest, value.to_numpy())
+    elif isinstance(value, dict):
+        for key, item in sorted(value.items(), key=lambda pair: stable_hash(pair[0])):
+            _update_hash(digest, key)
+            _update_hash(digest, item)
+    elif isinstance(value, (list, tuple, range)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _update_hash(digest, item)
+    elif isinstance(value, (set, frozenset)):
+        for item_hash in sorted(stable_hash(item) for item in value):
+            digest.update(item_hash.encode())
+    else:
+        try:
+            digest.update(pickle.dumps(value, protocol=4))
+        except Exception:
+            digest.update(repr(value).encode())
+
+def stable_hash(value):
+    """
+    Hash a value by content, consistently across processes and runs.
+
+    Args:
+    - value: Value to hash, including dicts, lists, DataFrames and NumPy arrays.
+
+    Returns:
+    - str: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _update_hash(digest, value)
+    return digest.hexdigest()
+
+def estimate_size(value):
+    """
+    Estimate the memory held by a cached value in bytes.
+
+    Args:
+    - value: Value to measure.
+
+    Returns:
+    - int: Approximate size in bytes.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class MemoCache:
+    """
+    Thread-safe LRU cache with optional time-to-live and memory cap.
+
+    Args:
+    - maxsize (int, optional): Maximum number of entries.
+    - ttl (float, optional): Seconds an entry stays valid.
+    - max_bytes (int, optional): Maximum estimated size of all entries.
+    """
+
+    def __init__(self, maxsize=128, ttl=None, max_bytes=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """
+        Look up a key.
+
+        Returns:
+        - tuple: (found, value).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def set(self, key, value):
+        """
+        Store a value, evicting least recently used entries to stay within the limits.
+        Values larger than the memory cap are not stored.
+        """
+        size = estimate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires, size)
+            self._bytes += size
+            while self._entries and ((self.maxsize is not None and len(self._entries) > self.maxsize)
+                                     or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """
+        Drop all entries and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def info(self):
+        """
+        Report cache counters.
+
+        Returns:
+        - dict: Hits, misses, evictions, expirations, entry count and estimated bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+_registry = {}
+
+def memoize(maxsize=128, ttl=None, max_bytes=None, copy_results=True):
+    """
+    Memoize a function on the content of its arguments.
+
+    Arguments are bound to the function signature, so positional and keyword calls share
+    entries. Unlike st.cache_data this works outside Streamlit, in scripts and batch jobs.
+
+    Args:
+    - maxsize (int, optional): Maximum number of cached results.
+    - ttl (float, optional): Seconds a result stays valid.
+    - max_bytes (int, optional): Maximum estimated size of all cached results.
+    - copy_results (bool): Return deep copies so callers cannot mutate cached results.
+
+    Returns:
+    - callable: Decorator adding cache_info() and cache_clear() to the function.
+    """
+    def decorator(func):
+        cache = MemoCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes)
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = stable_hash(dict(bound.arguments))
+            found, value = cache.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                cache.set(key, value)
+            return copy.deepcopy(value) if copy_results else value
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        _registry[name] = cache
+        return wrapper
+
+    return decorator
+
+def cache_stats():
+    """
+    Report the counters of every memoized function.
+
+    Returns:
+    - pd.DataFrame: One row per function with its hits, misses, evictions, expirations,
+      entry count and estimated bytes.
+    """
+    return pd.DataFrame([{"function": name, **cache.info()} for name, cache in _registry.items()])
+
+def clear_caches():
+    """
+    Clear the caches of every memoized function.
+    """
+    for cache in _registry.values():
+        cache.clear()
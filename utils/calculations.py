@@ -1,8 +1,100 @@
 # utils/calculations.py
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+
 import numpy as np
 import pandas as pd
 
+from utils.cache import memoize
+
+def compile_tax_brackets(tax_brackets):
+    """
+    Precompile tax brackets into lookup tables for vectorized tax calculation.
+
+    Each bracket taxes the income above its threshold at its rate, up to the next
+    threshold. Brackets may be given in any order; non-finite thresholds are ignored.
+
+    Args:
+    - tax_brackets (list of tuples): Tax brackets as (income_threshold, tax_rate).
+
+    Returns:
+    - dict: Sorted 'thresholds', matching 'rates', 'widths' of each bracket and
+      'cumulative_tax' owed on an income equal to each threshold.
+    """
+    if isinstance(tax_brackets, dict):
+        return tax_brackets
+
+    brackets = np.array(tax_brackets, dtype=float).reshape(-1, 2)
+    brackets = brackets[np.isfinite(brackets[:, 0])]
+    brackets = brackets[np.argsort(brackets[:, 0], kind="stable")]
+    thresholds = brackets[:, 0]
+    rates = brackets[:, 1]
+
+    widths = np.append(np.diff(thresholds), np.inf)
+    cumulative_tax = np.concatenate(([0.0], np.cumsum(widths[:-1] * rates[:-1])))
+
+    return {
+        "thresholds": thresholds,
+        "rates": rates,
+        "widths": widths,
+        "cumulative_tax": cumulative_tax
+    }
+
+def calculate_take_home_pay_batch(salaries, deductions, tax_brackets, include_brackets=False):
+    """
+    Calculate take-home pay for many salaries in one vectorized pass.
+
+    Args:
+    - salaries (array-like): Annual gross salaries.
+    - deductions (array-like or float): Annual deductions, broadcast against salaries.
+    - tax_brackets (list of tuples or dict): Tax brackets as (income_threshold, tax_rate),
+      or a table returned by compile_tax_brackets.
+    - include_brackets (bool): Also return the tax paid in each bracket.
+
+    Returns:
+    - dict: Arrays of 'gross_salary', 'deductions', 'taxable_income', 'taxes',
+      'net_salary' and 'monthly_take_home'. With include_brackets, 'bracket_thresholds'
+      and a (salaries x brackets) 'bracket_taxes' array are added.
+    """
+    table = compile_tax_brackets(tax_brackets)
+    thresholds = table["thresholds"]
+    rates = table["rates"]
+
+    salaries, deductions = np.broadcast_arrays(np.asarray(salaries, dtype=float),
+                                               np.asarray(deductions, dtype=float))
+    taxable_income = np.maximum(salaries - deductions, 0.0)
+
+    if thresholds.size:
+        index = np.searchsorted(thresholds, taxable_income, side="right") - 1
+        in_bracket = index >= 0
+        safe_index = np.where(in_bracket, index, 0)
+        taxes = np.where(
+            in_bracket,
+            table["cumulative_tax"][safe_index] + (taxable_income - thresholds[safe_index]) * rates[safe_index],
+            0.0
+        )
+    else:
+        taxes = np.zeros_like(taxable_income)
+
+    net_salary = salaries - taxes - deductions
+    result = {
+        "gross_salary": salaries,
+        "deductions": deductions,
+        "taxable_income": taxable_income,
+        "taxes": taxes,
+        "net_salary": net_salary,
+        "monthly_take_home": net_salary / 12
+    }
+
+    if include_brackets:
+        income_in_bracket = np.clip(taxable_income[..., np.newaxis] - thresholds, 0.0, table["widths"])
+        result["bracket_thresholds"] = thresholds
+        result["bracket_taxes"] = income_in_bracket * rates
+
+    return result
+
 def calculate_take_home_pay(salary, deductions, tax_brackets):
     """
     Calculate monthly take-home pay after taxes and deductions.
@@ -10,30 +102,84 @@ def calculate_take_home_pay(salary, deductions, tax_brackets):
     Args:
     - salary (float): Annual gross salary.
     - deductions (float): Total annual deductions.
-    - tax_brackets (list of tuples): Tax brackets as (income_threshold, tax_rate).
+    - tax_brackets (list of tuples): Tax brackets as (income_threshold, tax_rate),
+      where income above each threshold is taxed at its rate.
 
     Returns:
     - float: Monthly take-home pay.
     - dict: Detailed breakdown of taxes and deductions.
     """
-    taxable_income = salary - deductions
-    taxes = 0
-    for threshold, rate in tax_brackets:
-        if taxable_income > threshold:
-            taxes += (taxable_income - threshold) * rate
-            taxable_income = threshold
-
-    annual_take_home = salary - taxes - deductions
-    monthly_take_home = annual_take_home / 12
+    result = calculate_take_home_pay_batch([salary], [deductions], tax_brackets)
 
     breakdown = {
         "gross_salary": salary,
         "deductions": deductions,
-        "taxes": taxes,
-        "net_salary": annual_take_home
+        "taxes": float(result["taxes"][0]),
+        "net_salary": float(result["net_salary"][0])
     }
 
-    return monthly_take_home, breakdown
+    return float(result["monthly_take_home"][0]), breakdown
+
+def _scatter_year_amounts(amounts, shape):
+    """
+    Expand per-employee, per-year amounts into a dense (employees x years) block.
+
+    Args:
+    - amounts (array-like or tuple): Dense array broadcastable to shape, or a sparse
+      (employee_index, year_index, amount) tuple of arrays.
+    - shape (tuple): Shape of the output block.
+
+    Returns:
+    - np.ndarray: Dense block of amounts, zero where nothing was given.
+    """
+    block = np.zeros(shape)
+    if amounts is None:
+        return block
+    if isinstance(amounts, tuple) and len(amounts) == 3:
+        employee_index, year_index, values = (np.asarray(a) for a in amounts)
+        in_range = (year_index >= 0) & (year_index < shape[1])
+        np.add.at(block, (employee_index[in_range], year_index[in_range]), np.asarray(values, dtype=float)[in_range])
+        return block
+    block += np.asarray(amounts, dtype=float)
+    return block
+
+def forecast_salary_growth_batch(salaries, annual_growth_rates, years, raises=None, bonuses=None, as_frame=False):
+    """
+    Forecast salaries for many employees at once as an (employees x years) block.
+
+    Year 0 is the current year. The base salary compounds at the growth rate, raises
+    are permanent and compound from the year they are granted, and bonuses are paid
+    once in their year without compounding.
+
+    Args:
+    - salaries (array-like): Current annual salary per employee.
+    - annual_growth_rates (float or array-like): Growth rate as a decimal, either per
+      employee or per employee and year (employees x years).
+    - years (int): Number of years to forecast.
+    - raises (array-like or tuple, optional): Raise amounts as a dense (employees x years)
+      array or a sparse (employee_index, year_index, amount) tuple.
+    - bonuses (array-like or tuple, optional): Bonus amounts in the same forms as raises.
+    - as_frame (bool): Return a wide DataFrame with one column per year.
+
+    Returns:
+    - np.ndarray or pd.DataFrame: Projected annual pay per employee and year.
+    """
+    salaries = np.atleast_1d(np.asarray(salaries, dtype=float))
+    shape = (salaries.size, int(years))
+
+    rates = np.asarray(annual_growth_rates, dtype=float)
+    if rates.ndim < 2:
+        rates = np.broadcast_to(rates.reshape(-1, 1), shape)
+    growth = np.ones(shape)
+    growth[:, 1:] = np.cumprod(1 + rates[:, 1:], axis=1)
+
+    raise_block = _scatter_year_amounts(raises, shape)
+    base = growth * (salaries[:, np.newaxis] + np.cumsum(raise_block / growth, axis=1))
+    pay = base + _scatter_year_amounts(bonuses, shape)
+
+    if as_frame:
+        return pd.DataFrame(pay, columns=pd.RangeIndex(shape[1], name="Year"))
+    return pay
 
 def forecast_salary_growth(salary, annual_growth_rate, raises, bonuses, years):
     """
@@ -42,21 +188,82 @@ def forecast_salary_growth(salary, annual_growth_rate, raises, bonuses, years):
     Args:
     - salary (float): Current annual salary.
     - annual_growth_rate (float): Expected annual growth rate as a decimal.
-    - raises (dict): Yearly raises as {year: raise_amount}.
-    - bonuses (dict): Yearly bonuses as {year: bonus_amount}.
+    - raises (dict): Yearly raises as {year: raise_amount}, carried into later years.
+    - bonuses (dict): Yearly bonuses as {year: bonus_amount}, paid once.
     - years (int): Number of years to forecast.
 
     Returns:
     - pd.Series: Projected annual salaries over the specified years.
     """
-    salary_series = pd.Series([salary] * years)
-    for year in range(years):
-        if year in raises:
-            salary_series[year] += raises[year]
-        if year in bonuses:
-            salary_series[year] += bonuses[year]
-        salary_series[year] *= (1 + annual_growth_rate)
-    return salary_series
+    def to_sparse(amounts):
+        year_index = np.fromiter(amounts.keys(), dtype=int, count=len(amounts))
+        values = np.fromiter(amounts.values(), dtype=float, count=len(amounts))
+        return np.zeros(len(amounts), dtype=int), year_index, values
+
+    pay = forecast_salary_growth_batch([salary], annual_growth_rate, years,
+                                       raises=to_sparse(raises or {}), bonuses=to_sparse(bonuses or {}))
+    return pd.Series(pay[0])
+
+def project_expenses(expenses, inflation_rates, periods, categories=None, frequency="annual", as_frame=True):
+    """
+    Project expenses under inflation for every category and period in one broadcasting step.
+
+    Inflation rates are annual. With monthly frequency each step compounds a twelfth
+    of a year; amounts are projected in whatever unit they are given.
+
+    Args:
+    - expenses (dict or array-like): Current expenses by category.
+    - inflation_rates (dict or array-like): Annual inflation rates as decimals, either one
+      per category or a time-varying path per category (periods x categories). A dict
+      requires expenses as a dict or categories to pick its rates. A path shorter than the
+      projection holds its last rate. Rate t applies from period t to period t + 1.
+    - periods (int): Number of periods to project, including the current one.
+    - categories (list, optional): Categories to project; defaults to all expense keys.
+    - frequency (str): 'annual' or 'monthly' steps.
+    - as_frame (bool): Return a DataFrame with one column per category.
+
+    Returns:
+    - pd.DataFrame or np.ndarray: Projected expenses as (periods x categories).
+    """
+    steps_per_year = {"annual": 1, "monthly": 12}.get(frequency)
+    if steps_per_year is None:
+        raise ValueError("Unsupported frequency. Use 'annual' or 'monthly'.")
+    periods = int(periods)
+
+    if isinstance(expenses, dict):
+        categories = list(expenses) if categories is None else list(categories)
+        base = np.array([expenses[category] for category in categories], dtype=float)
+    else:
+        base = np.atleast_1d(np.asarray(expenses, dtype=float))
+
+    if isinstance(inflation_rates, dict):
+        if categories is None:
+            raise ValueError("Inflation rates given by category need expenses as a dict or a list of categories.")
+        paths = [np.atleast_1d(np.asarray(inflation_rates[category], dtype=float)) for category in categories]
+        if all(path.size == 1 for path in paths):
+            rates = np.array([path[0] for path in paths])
+        else:
+            rates = np.empty((periods, len(paths)))
+            for column, path in enumerate(paths):
+                rates[:, column] = np.pad(path[:periods], (0, max(periods - path.size, 0)), mode="edge")
+    else:
+        rates = np.asarray(inflation_rates, dtype=float)
+
+    if rates.ndim < 2:
+        elapsed_years = np.arange(periods)[:, np.newaxis] / steps_per_year
+        projected = base * (1 + rates) ** elapsed_years
+    else:
+        if rates.shape[0] == 0:
+            raise ValueError("Inflation rate paths must have at least one period.")
+        # A path shorter than the projection holds its last rate
+        rates = np.pad(rates[:periods - 1], ((0, max(periods - 1 - rates.shape[0], 0)), (0, 0)), mode="edge")
+        step_growth = (1 + rates) ** (1 / steps_per_year)
+        growth = np.vstack((np.ones((1, rates.shape[1])), np.cumprod(step_growth, axis=0)))
+        projected = base * growth
+
+    if as_frame:
+        return pd.DataFrame(projected, columns=categories)
+    return projected
 
 def forecast_expenses(expenses, inflation_rates, categories, years):
     """
@@ -71,11 +278,7 @@ def forecast_expenses(expenses, inflation_rates, categories, years):
     Returns:
     - pd.DataFrame: Projected annual expenses for each category over the specified years.
     """
-    forecasted_expenses = pd.DataFrame({category: [expenses[category]] * years for category in categories})
-    for year in range(1, years):
-        for category in categories:
-            forecasted_expenses.loc[year, category] = forecasted_expenses.loc[year-1, category] * (1 + inflation_rates[category])
-    return forecasted_expenses
+    return project_expenses(expenses, inflation_rates, years, categories=categories)
 
 def simulate_investments(initial_investment, investment_options, portfolio, years):
     """
@@ -95,11 +298,108 @@ def simulate_investments(initial_investment, investment_options, portfolio, year
 
     for year in range(1, years + 1):
         growth = sum(investment_value * portfolio[investment] * investment_options[investment] for investment in portfolio)
-    investment_value += growth
-    investment_values.append(investment_value)
+        investment_value += growth
+        investment_values.append(investment_value)
 
     return investment_values
 
+# Smallest yearly growth factor in the Monte Carlo simulation; stands in for a total loss
+MIN_GROWTH = 1e-12
+
+def simulate_investments_monte_carlo(initial_investment, investment_options, volatilities, portfolio, years,
+                                     correlation=None, n_paths=100_000, chunk_size=10_000, seed=None,
+                                     percentiles=(5, 25, 50, 75, 95), bins=4096):
+    """
+    Simulate many random return paths for a diversified portfolio.
+
+    Asset returns are normally distributed with the given means, volatilities and
+    correlations, and the portfolio is rebalanced yearly, so each year's portfolio return
+    is itself normal with mean w.mu and variance w'Cw. Paths are drawn in chunks of
+    chunk_size and each chunk is folded into per-year summaries before the next is drawn:
+    a histogram of log values, a running sum and a count of losing paths. Memory therefore
+    depends on chunk_size and years but not on n_paths, and percentile bands are
+    interpolated from the histograms.
+
+    Args:
+    - initial_investment (float): Initial investment amount.
+    - investment_options (dict): Expected annual returns for different investments.
+    - volatilities (dict): Annual return standard deviations for the same investments.
+    - portfolio (dict): Portfolio weight for each investment; normalized to sum to 1.
+    - years (int): Number of years to simulate.
+    - correlation (array-like, optional): Correlation matrix ordered like portfolio.
+      Defaults to uncorrelated assets.
+    - n_paths (int): Number of simulated paths.
+    - chunk_size (int): Number of paths simulated at a time.
+    - seed (int, optional): Seed for reproducible results.
+    - percentiles (tuple of float): Percentile bands to report.
+    - bins (int): Histogram bins per year used to estimate the percentiles.
+
+    Returns:
+    - dict: 'bands' DataFrame of percentile values per year (columns like 'P50'), 'mean'
+      value per year, 'loss_probability_by_year' and the final 'probability_of_loss'.
+    """
+    names = list(portfolio)
+    weights = np.array([portfolio[name] for name in names], dtype=float)
+    weights = weights / weights.sum()
+    means = np.array([investment_options[name] for name in names], dtype=float)
+    vols = np.array([volatilities[name] for name in names], dtype=float)
+    correlation = np.eye(len(names)) if correlation is None else np.asarray(correlation, dtype=float)
+
+    covariance = correlation * np.outer(vols, vols)
+    portfolio_mean = weights @ means
+    portfolio_vol = np.sqrt(max(weights @ covariance @ weights, 0.0))
+
+    years = int(years)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((years, bins), dtype=np.int64)
+    value_sums = np.zeros(years)
+    losses = np.zeros(years, dtype=np.int64)
+    offsets = np.arange(years) * bins
+    low = width = None
+
+    for start in range(0, n_paths, chunk_size):
+        stop = min(start + chunk_size, n_paths)
+        growth = 1 + portfolio_mean + portfolio_vol * rng.standard_normal((stop - start, years))
+        # A total loss is floored at a negligible value so it stays finite in log space
+        np.maximum(growth, MIN_GROWTH, out=growth)
+        log_growth = np.cumsum(np.log(growth), axis=1)
+
+        if low is None:
+            # Bin edges come from the first chunk, padded so later chunks rarely fall outside;
+            # values that do are counted in the end bins
+            lowest, highest = log_growth.min(axis=0), log_growth.max(axis=0)
+            padding = (highest - lowest) / 2 + 1e-9
+            low = lowest - padding
+            width = (highest - lowest + 2 * padding) / bins
+
+        index = np.clip(((log_growth - low) / width).astype(np.int64), 0, bins - 1)
+        counts += np.bincount((index + offsets).ravel(), minlength=years * bins).reshape(years, bins)
+        value_sums += np.exp(log_growth).sum(axis=0)
+        losses += (log_growth < 0).sum(axis=0)
+
+    columns = {}
+    cumulative = np.cumsum(counts, axis=1)
+    rows = np.arange(years)
+    for p in percentiles:
+        target = p / 100 * n_paths
+        # First bin whose cumulative count reaches the target rank
+        position = np.minimum((cumulative < target).sum(axis=1), bins - 1)
+        below = np.where(position > 0, cumulative[rows, np.maximum(position - 1, 0)], 0)
+        in_bin = counts[rows, position]
+        fraction = np.where(in_bin > 0, (target - below) / np.maximum(in_bin, 1), 0.5)
+        log_value = low + (position + np.clip(fraction, 0, 1)) * width
+        columns[f"P{p:g}"] = np.concatenate(([initial_investment], initial_investment * np.exp(log_value)))
+
+    bands = pd.DataFrame(columns, index=pd.RangeIndex(years + 1, name="Year"))
+    loss_probability = np.concatenate(([0.0], losses / n_paths))
+
+    return {
+        "bands": bands,
+        "mean": np.concatenate(([initial_investment], initial_investment * value_sums / n_paths)),
+        "loss_probability_by_year": loss_probability,
+        "probability_of_loss": float(loss_probability[-1])
+    }
+
 def calculate_budget_vs_actual(budget, actual):
     """
     Calculate the difference between budgeted and actual spending.
@@ -120,6 +420,95 @@ def calculate_budget_vs_actual(budget, actual):
     }
     return pd.DataFrame(data)
 
+def retirement_future_value(current_savings, annual_contribution, years_to_retirement, annual_growth_rate):
+    """
+    Closed-form future value of retirement savings, broadcast over array inputs.
+
+    Contributions are made at the start of each year, so savings grow as
+    S * (1 + g)^n + C * (1 + g) * ((1 + g)^n - 1) / g, or S + C * n when g is zero.
+
+    Args:
+    - current_savings (float or array-like): Current savings amount.
+    - annual_contribution (float or array-like): Annual contribution amount.
+    - years_to_retirement (int or array-like): Number of years until retirement.
+    - annual_growth_rate (float or array-like): Expected annual growth rate as a decimal.
+
+    Returns:
+    - np.ndarray: Estimated savings at retirement.
+    """
+    rate = np.asarray(annual_growth_rate, dtype=float)
+    years = np.asarray(years_to_retirement, dtype=float)
+    log_growth = years * np.log1p(rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(rate == 0, years, np.expm1(log_growth) / rate * (1 + rate))
+    return current_savings * np.exp(log_growth) + annual_contribution * annuity
+
+def _retirement_sweep_chunk(task):
+    """
+    Evaluate one contiguous slice of a flattened retirement sweep grid.
+
+    Args:
+    - task (tuple): (axes, start, stop) where axes are the growth rate, contribution,
+      years and savings arrays, and start/stop bound the flat grid positions.
+
+    Returns:
+    - np.ndarray: Future value for each grid position in the slice.
+    """
+    axes, start, stop = task
+    shape = tuple(axis.size for axis in axes)
+    index = np.unravel_index(np.arange(start, stop), shape)
+    rates, contributions, years, savings = (axis[i] for axis, i in zip(axes, index))
+    return retirement_future_value(savings, contributions, years, rates)
+
+@memoize(maxsize=32, max_bytes=256 * 1024 ** 2)
+def sweep_retirement_scenarios(annual_growth_rates, annual_contributions, years_to_retirement, current_savings,
+                               workers=None, chunk_size=250_000, as_frame=True):
+    """
+    Evaluate retirement savings over a full parameter grid.
+
+    The grid is growth rate x contribution x years x starting savings, flattened in that
+    order. Grids larger than chunk_size are split into chunks evaluated in a process pool;
+    chunks are reassembled in grid order, so results are deterministic.
+
+    Args:
+    - annual_growth_rates (float or array-like): Growth rates as decimals.
+    - annual_contributions (float or array-like): Annual contribution amounts.
+    - years_to_retirement (int or array-like): Numbers of years until retirement.
+    - current_savings (float or array-like): Starting savings amounts.
+    - workers (int, optional): Number of worker processes. Defaults to the CPU count for
+      grids larger than chunk_size; 1 evaluates everything in this process.
+    - chunk_size (int): Number of grid cells evaluated per task.
+    - as_frame (bool): Return a tidy DataFrame instead of a structured array.
+
+    Returns:
+    - pd.DataFrame or np.ndarray: One row per grid cell with 'annual_growth_rate',
+      'annual_contribution', 'years_to_retirement', 'current_savings' and 'future_value'.
+    """
+    axes = tuple(np.atleast_1d(np.asarray(axis, dtype=float)).ravel()
+                 for axis in (annual_growth_rates, annual_contributions, years_to_retirement, current_savings))
+    size = int(np.prod([axis.size for axis in axes]))
+    tasks = [(axes, start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            chunks = list(executor.map(_retirement_sweep_chunk, tasks))
+    else:
+        chunks = [_retirement_sweep_chunk(task) for task in tasks]
+
+    columns = ["annual_growth_rate", "annual_contribution", "years_to_retirement", "current_savings", "future_value"]
+    result = np.empty(size, dtype=[(column, float) for column in columns])
+    for column, values in zip(columns, np.meshgrid(*axes, indexing="ij")):
+        result[column] = values.ravel()
+    result["future_value"] = np.concatenate(chunks) if chunks else []
+
+    if as_frame:
+        frame = pd.DataFrame(result)
+        frame["years_to_retirement"] = frame["years_to_retirement"].astype(int)
+        return frame
+    return result
+
 def calculate_retirement_savings(current_savings, annual_contribution, years_to_retirement, annual_growth_rate):
     """
     Calculate the future value of retirement savings.
@@ -133,10 +522,7 @@ def calculate_retirement_savings(current_savings, annual_contribution, years_to_
     Returns:
     - float: Estimated savings at retirement.
     """
-    future_value = current_savings
-    for _ in range(years_to_retirement):
-        future_value = (future_value + annual_contribution) * (1 + annual_growth_rate)
-    return future_value
+    return float(retirement_future_value(current_savings, annual_contribution, years_to_retirement, annual_growth_rate))
 
 def simulate_retirement_scenarios(current_savings, annual_contribution, years_to_retirement, annual_growth_rates):
     """
@@ -151,10 +537,10 @@ def simulate_retirement_scenarios(current_savings, annual_contribution, years_to
     Returns:
     - pd.DataFrame: DataFrame containing the simulated savings for each growth rate.
     """
-    scenarios = {}
-    for rate in annual_growth_rates:
-        savings = calculate_retirement_savings(current_savings, annual_contribution, years_to_retirement, rate)
-        scenarios[f"{rate * 100}% Growth"] = savings
+    sweep = sweep_retirement_scenarios(annual_growth_rates, annual_contribution, years_to_retirement,
+                                       current_savings, workers=1)
+    scenarios = {f"{rate * 100}% Growth": savings
+                 for rate, savings in zip(annual_growth_rates, sweep["future_value"])}
     return pd.DataFrame(scenarios, index=[0])
 
 def track_debt_payments(debts):
@@ -187,6 +573,359 @@ def track_debt_payments(debts):
 
     return pd.DataFrame(debt_data)
 
+def _amortized_balance(balance, payment, monthly_rate, months):
+    """
+    Balance remaining after a number of fixed monthly payments, in closed form.
+
+    Args:
+    - balance (float or np.ndarray): Starting balance.
+    - payment (float or np.ndarray): Fixed monthly payment.
+    - monthly_rate (float or np.ndarray): Monthly interest rate as a decimal.
+    - months (int or np.ndarray): Number of payments made.
+
+    Returns:
+    - np.ndarray: Remaining balance, negative if the payments overshoot.
+    """
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(monthly_rate == 0,
+                        balance - payment * months,
+                        balance * growth - payment * (growth - 1) / monthly_rate)
+
+def _months_to_payoff(balance, payment, monthly_rate):
+    """
+    Fractional number of months until a balance reaches zero under a fixed payment.
+
+    Args:
+    - balance (np.ndarray): Current balances.
+    - payment (np.ndarray): Fixed monthly payments.
+    - monthly_rate (np.ndarray): Monthly interest rates as decimals.
+
+    Returns:
+    - np.ndarray: Months to payoff, or inf where the payment does not cover interest.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = monthly_rate * balance / payment
+        months = np.where(monthly_rate == 0,
+                          np.where(payment > 0, balance / payment, np.inf),
+                          np.where((payment > 0) & (ratio < 1), -np.log1p(-ratio) / np.log1p(monthly_rate), np.inf))
+    return np.where(balance > 0, months, 0.0)
+
+def _debt_arrays(debts):
+    """
+    Extract names, balances, monthly rates and payments from a list of debt dicts.
+
+    Args:
+    - debts (list of dict): List of debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+
+    Returns:
+    - tuple: Names list and balance, monthly rate and payment arrays.
+    """
+    names = [debt['name'] for debt in debts]
+    balances = np.array([debt['balance'] for debt in debts], dtype=float)
+    monthly_rates = np.array([debt['interest_rate'] for debt in debts], dtype=float) / 100 / 12
+    payments = np.array([debt['monthly_payment'] for debt in debts], dtype=float)
+    return names, balances, monthly_rates, payments
+
+def plan_debt_payoff(debts, order=None, extra_payment=0.0):
+    """
+    Plan a rolling debt payoff by jumping between payoff events.
+
+    Every debt pays its own monthly payment. Between payoff events balances follow the
+    closed-form amortization formula, so the plan only takes one step per payoff. When a
+    debt is paid off, its payment rolls to the highest-priority unpaid debt from the
+    following month. Input dicts are not modified.
+
+    Args:
+    - debts (list of dict): List of debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+    - order (list of int, optional): Debt indices in payoff priority order. Defaults to
+      the snowball order (smallest balance first).
+    - extra_payment (float): Monthly amount on top of the minimum payments, paid to the
+      highest-priority unpaid debt.
+
+    Returns:
+    - dict: 'names', priority 'order', 'payoff_month' and 'total_interest' per debt, the
+      overall 'months' and 'total_interest', and the 'segments' between payoff events.
+
+    Raises:
+    - ValueError: If some debts can never be paid off because their payments never cover interest.
+    """
+    names, balances, monthly_rates, payments = _debt_arrays(debts)
+    if order is None:
+        order = np.argsort(balances, kind="stable")
+    order = np.asarray(order, dtype=int)
+
+    interest = monthly_rates * balances
+    budget = payments.sum() + extra_payment
+    if interest.max(initial=0.0) >= budget and balances.any():
+        stuck = [names[i] for i in np.flatnonzero(interest >= budget)]
+        raise ValueError(f"Debts can never be paid off, interest exceeds all payments: {stuck}")
+
+    result = _simulate_debt_orders(balances, monthly_rates, payments, order[np.newaxis, :], extra_payment,
+                                   record_segments=True)
+    if result["stuck"][0].any():
+        stuck = [names[i] for i in np.flatnonzero(result["stuck"][0])]
+        raise ValueError(f"Debts can never be paid off, payments do not cover interest: {stuck}")
+
+    debt_interest = result["paid"][0] - balances
+    return {
+        "names": names,
+        "order": order,
+        "balances": balances,
+        "monthly_rates": monthly_rates,
+        "payoff_month": result["payoff_month"][0],
+        "total_interest": debt_interest,
+        "months": int(result["months"][0]),
+        "total_interest_paid": float(debt_interest.sum()),
+        "segments": result["segments"]
+    }
+
+def _simulate_debt_orders(balances, monthly_rates, payments, orders, extra_payment, record_segments=False):
+    """
+    Step candidate payoff orders through their payoff events side by side.
+
+    Between events balances follow the closed-form amortization formula. When a debt is
+    paid off, its payment rolls to the highest-priority unpaid debt of that order from the
+    following month. An order stops once its remaining payments no longer cover interest.
+
+    Args:
+    - balances (np.ndarray): Starting balance per debt.
+    - monthly_rates (np.ndarray): Monthly interest rate per debt.
+    - payments (np.ndarray): Minimum monthly payment per debt.
+    - orders (np.ndarray): Priority orders as (orders x debts) debt indices.
+    - extra_payment (float): Monthly amount paid to the highest-priority unpaid debt.
+    - record_segments (bool): Record the segments between payoff events of the first order.
+
+    Returns:
+    - dict: (orders x debts) arrays 'paid', 'payoff_month' and 'stuck' (debts left unpaid
+      because payments stopped covering interest), 'months' per order and 'segments'.
+    """
+    candidates, count = orders.shape
+    rows = np.arange(candidates)
+
+    rank = np.empty_like(orders)
+    rank[rows[:, np.newaxis], orders] = np.arange(count)
+    balance = np.tile(balances, (candidates, 1))
+    payment = np.tile(payments, (candidates, 1))
+    active = balance > 0
+    stuck = np.zeros_like(active)
+
+    def pay_top_priority(amount):
+        has_active = active.any(axis=1)
+        if not has_active.any():
+            return
+        target = np.argmin(np.where(active, rank, count), axis=1)
+        payment[rows[has_active], target[has_active]] += np.broadcast_to(amount, candidates)[has_active]
+
+    pay_top_priority(extra_payment)
+    paid = np.zeros((candidates, count))
+    payoff_month = np.zeros((candidates, count), dtype=int)
+    months = np.zeros(candidates, dtype=int)
+    segments = []
+
+    while active.any():
+        months_left = np.where(active, _months_to_payoff(balance, payment, monthly_rates), np.inf)
+        blocked = active.any(axis=1) & ~np.isfinite(months_left).any(axis=1)
+        stuck[blocked] = active[blocked]
+        active[blocked] = False
+
+        event_months = np.ceil(months_left - 1e-9)
+        step = np.where(active.any(axis=1), np.maximum(event_months.min(axis=1, initial=np.inf), 1), 0)
+        step = np.where(np.isfinite(step), step, 0).astype(int)[:, np.newaxis]
+        if record_segments and step[0, 0] > 0:
+            segments.append({"start": int(months[0]), "stop": int(months[0] + step[0, 0]),
+                             "balance": balance[0].copy(), "payment": payment[0].copy()})
+
+        finished = active & (event_months <= step)
+        continuing = active & ~finished
+        before_final = _amortized_balance(balance, payment, monthly_rates, np.maximum(step - 1, 0))
+        paid += np.where(finished, payment * (step - 1) + before_final * (1 + monthly_rates), 0.0)
+        paid += np.where(continuing, payment * step, 0.0)
+
+        balance = np.where(continuing, _amortized_balance(balance, payment, monthly_rates, step), 0.0)
+        months += step[:, 0]
+        payoff_month = np.where(finished, months[:, np.newaxis], payoff_month)
+
+        freed = np.where(finished, payment, 0.0).sum(axis=1)
+        payment[finished] = 0.0
+        active = balance > 0
+        pay_top_priority(freed)
+
+    return {"paid": paid, "payoff_month": payoff_month, "stuck": stuck, "months": months, "segments": segments}
+
+def debt_payoff_schedule(plan):
+    """
+    Materialize the full monthly schedule of a payoff plan as columnar arrays.
+
+    Args:
+    - plan (dict): Plan returned by plan_debt_payoff.
+
+    Returns:
+    - dict: 'month' numbers and (months x debts) arrays of 'balance', 'payment',
+      'interest', 'principal' and 'new_balance'. Paid-off debts show zeros.
+    """
+    months = plan["months"]
+    shape = (months, len(plan["names"]))
+    columns = {name: np.zeros(shape) for name in ("balance", "payment", "interest", "principal", "new_balance")}
+    rates = plan["monthly_rates"]
+
+    for segment in plan["segments"]:
+        start, stop = segment["start"], segment["stop"]
+        elapsed = np.arange(stop - start)[:, np.newaxis]
+        balance = np.maximum(_amortized_balance(segment["balance"], segment["payment"], rates, elapsed), 0.0)
+        balance[:, segment["balance"] <= 0] = 0.0
+        interest = balance * rates
+        payment = np.minimum(segment["payment"], balance + interest)
+
+        columns["balance"][start:stop] = balance
+        columns["interest"][start:stop] = interest
+        columns["payment"][start:stop] = payment
+        columns["principal"][start:stop] = payment - interest
+        columns["new_balance"][start:stop] = balance + interest - payment
+
+    columns["month"] = np.arange(1, months + 1)
+    return columns
+
+def evaluate_debt_orders(debts, orders, extra_payment=0.0):
+    """
+    Evaluate many payoff priority orders for the same debts in one vectorized batch.
+
+    Runs the same simulation as plan_debt_payoff, with every candidate order stepping
+    through its payoff events side by side.
+
+    Args:
+    - debts (list of dict): List of debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+    - orders (array-like): Candidate priority orders as (orders x debts) debt indices.
+    - extra_payment (float): Monthly amount on top of the minimum payments.
+
+    Returns:
+    - dict: 'total_interest' and 'months' to debt freedom per order; inf for orders
+      that never pay everything off.
+    """
+    _, balances, monthly_rates, payments = _debt_arrays(debts)
+    orders = np.atleast_2d(np.asarray(orders, dtype=int))
+    result = _simulate_debt_orders(balances, monthly_rates, payments, orders, extra_payment)
+    feasible = ~result["stuck"].any(axis=1)
+    total_interest = result["paid"].sum(axis=1) - balances.sum()
+    return {
+        "total_interest": np.where(feasible, total_interest, np.inf),
+        "months": np.where(feasible, result["months"], np.inf)
+    }
+
+def _search_debt_order(debts, extra_payment, exhaustive_limit=7):
+    """
+    Search for the payoff order with the least total interest.
+
+    Small debt sets are searched exhaustively. Larger sets are built greedily: each
+    position tries every remaining debt, completes the order by highest rate first, and
+    keeps the candidate with the least interest.
+
+    Args:
+    - debts (list of dict): List of debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+    - extra_payment (float): Monthly amount on top of the minimum payments.
+    - exhaustive_limit (int): Largest number of debts searched over every permutation.
+
+    Returns:
+    - np.ndarray: Best order found as debt indices.
+    """
+    count = len(debts)
+    if count == 0:
+        return np.array([], dtype=int)
+    if count <= exhaustive_limit:
+        orders = np.array(list(permutations(range(count))), dtype=int).reshape(-1, count)
+        interest = evaluate_debt_orders(debts, orders, extra_payment)["total_interest"]
+        return orders[np.argmin(interest)]
+
+    rates = np.array([debt['interest_rate'] for debt in debts], dtype=float)
+    prefix = []
+    remaining = list(np.argsort(-rates, kind="stable"))
+    while len(remaining) > 1:
+        orders = np.array([prefix + [debt] + [d for d in remaining if d != debt] for debt in remaining], dtype=int)
+        interest = evaluate_debt_orders(debts, orders, extra_payment)["total_interest"]
+        best = remaining[int(np.argmin(interest))]
+        prefix.append(best)
+        remaining.remove(best)
+    return np.array(prefix + remaining, dtype=int)
+
+def optimize_debt_payoff(debts, monthly_budget, custom_orders=None, start_date=None):
+    """
+    Compare snowball, avalanche, custom and searched payoff orders for a monthly budget.
+
+    Minimum payments are paid on every debt and the rest of the budget goes to the
+    highest-priority unpaid debt. All candidate orders are evaluated in one batch and the
+    cheapest one is planned in full.
+
+    Args:
+    - debts (list of dict): List of debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+    - monthly_budget (float): Total amount available for debt payments each month.
+    - custom_orders (dict, optional): Named priority orders as {name: [debt indices]}.
+    - start_date (str or datetime, optional): Month of the first payment. Defaults to this month.
+
+    Returns:
+    - dict: 'comparison' DataFrame of every strategy, the best 'strategy', its 'order',
+      'total_interest', 'months', 'payoff_date', 'plan' and payment 'schedule'.
+
+    Raises:
+    - ValueError: If the budget does not cover the minimum payments.
+    """
+    # Resolve the default month here so cached results are keyed on it and do not go stale
+    start_month = str(pd.Timestamp(start_date or pd.Timestamp.today()).to_period("M"))
+    return _optimize_debt_payoff(debts, monthly_budget, custom_orders, start_month)
+
+@memoize(maxsize=128, ttl=3600)
+def _optimize_debt_payoff(debts, monthly_budget, custom_orders, start_month):
+    """
+    Cached body of optimize_debt_payoff for a resolved start month such as '2024-05'.
+    """
+    names, balances, _, payments = _debt_arrays(debts)
+    extra_payment = monthly_budget - payments.sum()
+    if extra_payment < 0:
+        raise ValueError(f"Monthly budget {monthly_budget:,.2f} does not cover minimum payments of {payments.sum():,.2f}")
+
+    rates = np.array([debt['interest_rate'] for debt in debts], dtype=float)
+    strategies = {
+        "Snowball": np.argsort(balances, kind="stable"),
+        "Avalanche": np.argsort(-rates, kind="stable"),
+    }
+    for name, order in (custom_orders or {}).items():
+        strategies[name] = np.asarray(order, dtype=int)
+    strategies["Optimized"] = _search_debt_order(debts, extra_payment)
+
+    evaluation = evaluate_debt_orders(debts, np.array(list(strategies.values())), extra_payment)
+    start = pd.Period(start_month, freq="M")
+    comparison = pd.DataFrame({
+        "Strategy": list(strategies),
+        "Order": [[names[i] for i in order] for order in strategies.values()],
+        "Total Interest": evaluation["total_interest"],
+        "Months": evaluation["months"],
+        "Payoff Date": [_payoff_date(start, months) for months in evaluation["months"]]
+    })
+
+    best = int(np.argmin(evaluation["total_interest"]))
+    order = list(strategies.values())[best]
+    plan = plan_debt_payoff(debts, order=order, extra_payment=extra_payment)
+    return {
+        "comparison": comparison,
+        "strategy": comparison["Strategy"][best],
+        "order": order,
+        "total_interest": plan["total_interest_paid"],
+        "months": plan["months"],
+        "payoff_date": comparison["Payoff Date"][best],
+        "plan": plan,
+        "schedule": _schedule_frame(plan, debt_payoff_schedule(plan))
+    }
+
+def _payoff_date(start, months):
+    """
+    Month of the last payment for a plan starting in start, as a timestamp.
+
+    A plan with no payments is debt free from its start month; one that never pays off has
+    no date.
+    """
+    if not np.isfinite(months):
+        return pd.NaT
+    return (start + max(int(months) - 1, 0)).to_timestamp()
+
 def debt_snowball_method(debts):
     """
     Apply the debt snowball method for debt reduction.
@@ -197,36 +936,33 @@ def debt_snowball_method(debts):
     Returns:
     - pd.DataFrame: DataFrame containing the debt snowball payment schedule.
     """
-    sorted_debts = sorted(debts, key=lambda x: x['balance'])
-    payment_schedule = []
-
-    while any(debt['balance'] > 0 for debt in sorted_debts):
-        for debt in sorted_debts:
-            if debt['balance'] > 0:
-                balance = debt['balance']
-                interest_rate = debt['interest_rate'] / 100
-                monthly_payment = debt['monthly_payment']
-                monthly_interest = balance * interest_rate / 12
-                principal_payment = monthly_payment - monthly_interest
-                new_balance = balance - principal_payment
-                debt['balance'] = new_balance if new_balance > 0 else 0
-
-                payment_schedule.append({
-                    'Name': debt['name'],
-                    'Balance': balance,
-                    'Monthly Payment': monthly_payment,
-                    'Monthly Interest': monthly_interest,
-                    'Principal Payment': principal_payment,
-                    'New Balance': debt['balance']
-                })
-
-                if debt['balance'] == 0:
-                    for d in sorted_debts:
-                        if d['balance'] > 0:
-                            d['monthly_payment'] += monthly_payment
-                            break
-
-    return pd.DataFrame(payment_schedule)
+    plan = plan_debt_payoff(debts)
+    return _schedule_frame(plan, debt_payoff_schedule(plan))
+
+def _schedule_frame(plan, schedule):
+    """
+    Convert a columnar payoff schedule into one row per debt per month with a balance.
+
+    Args:
+    - plan (dict): Plan returned by plan_debt_payoff.
+    - schedule (dict): Schedule returned by debt_payoff_schedule.
+
+    Returns:
+    - pd.DataFrame: Payment schedule ordered by month, then by debt priority.
+    """
+    order = plan["order"]
+    balance = schedule["balance"][:, order]
+    rows = balance > 0
+    month_index, debt_index = np.nonzero(rows)
+    return pd.DataFrame({
+        'Month': schedule["month"][month_index],
+        'Name': np.asarray(plan["names"], dtype=object)[order][debt_index],
+        'Balance': balance[rows],
+        'Monthly Payment': schedule["payment"][:, order][rows],
+        'Monthly Interest': schedule["interest"][:, order][rows],
+        'Principal Payment': schedule["principal"][:, order][rows],
+        'New Balance': schedule["new_balance"][:, order][rows]
+    })
 
 def calculate_goal_progress(goals, savings):
     """
@@ -257,6 +993,140 @@ def calculate_goal_progress(goals, savings):
 
     return pd.DataFrame(goal_data)
 
+def _goal_future_value(current_amounts, monthly_contributions, months, monthly_rates):
+    """
+    Future value of current savings plus end-of-month contributions, broadcast over arrays.
+
+    Args:
+    - current_amounts (np.ndarray): Amounts already saved.
+    - monthly_contributions (np.ndarray): Contributions made at the end of each month.
+    - months (np.ndarray): Number of months until the deadline.
+    - monthly_rates (np.ndarray): Monthly returns as decimals.
+
+    Returns:
+    - np.ndarray: Value at the deadline.
+    """
+    growth = (1 + monthly_rates) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(monthly_rates == 0, months, (growth - 1) / monthly_rates)
+    return current_amounts * growth + monthly_contributions * annuity
+
+def months_until(deadlines, as_of=None):
+    """
+    Count whole months from a reference date until each deadline.
+
+    Args:
+    - deadlines (array-like): Deadline dates.
+    - as_of (str or datetime, optional): Reference date. Defaults to today.
+
+    Returns:
+    - np.ndarray: Months until each deadline, zero for deadlines already passed.
+    """
+    start = pd.Timestamp(as_of or pd.Timestamp.today()).to_period("M").ordinal
+    ends = pd.PeriodIndex(pd.to_datetime(np.atleast_1d(deadlines)), freq="M").asi8
+    return np.maximum(ends - start, 0)
+
+def required_monthly_contribution(target_amounts, current_amounts, months, annual_returns):
+    """
+    Solve the monthly contribution each goal needs to reach its target, in closed form.
+
+    Annual returns compound monthly and contributions are made at the end of each month.
+
+    Args:
+    - target_amounts (float or array-like): Goal target amounts.
+    - current_amounts (float or array-like): Amounts already saved.
+    - months (int or array-like): Months until each deadline.
+    - annual_returns (float or array-like): Expected annual returns as decimals.
+
+    Returns:
+    - np.ndarray: Required monthly contributions; zero for goals already on track and
+      inf for unfunded goals whose deadline has passed.
+    """
+    target_amounts, current_amounts, months, annual_returns = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (target_amounts, current_amounts, months, annual_returns)))
+    monthly_rates = (1 + annual_returns) ** (1 / 12) - 1
+    shortfall = target_amounts - _goal_future_value(current_amounts, 0.0, months, monthly_rates)
+    annuity = _goal_future_value(0.0, 1.0, months, monthly_rates)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contribution = np.where(shortfall <= 0, 0.0, np.where(months > 0, shortfall / annuity, np.inf))
+    return contribution
+
+def required_annual_return(target_amounts, current_amounts, months, monthly_contributions,
+                           bounds=(-0.99, 1.0), tol=1e-10, max_iter=200):
+    """
+    Solve the annual return each goal needs to reach its target by vectorized bisection.
+
+    Args:
+    - target_amounts (float or array-like): Goal target amounts.
+    - current_amounts (float or array-like): Amounts already saved.
+    - months (int or array-like): Months until each deadline.
+    - monthly_contributions (float or array-like): Planned end-of-month contributions.
+    - bounds (tuple of float): Lowest and highest annual returns searched.
+    - tol (float): Tolerance on the monthly rate.
+    - max_iter (int): Maximum number of bisection steps.
+
+    Returns:
+    - np.ndarray: Required annual returns as decimals; the lower bound for goals reached
+      at any return in range and NaN for goals unreachable within the bounds.
+    """
+    target_amounts, current_amounts, months, monthly_contributions = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (target_amounts, current_amounts, months, monthly_contributions)))
+    low = np.full(target_amounts.shape, (1 + bounds[0]) ** (1 / 12) - 1)
+    high = np.full(target_amounts.shape, (1 + bounds[1]) ** (1 / 12) - 1)
+
+    def shortfall(rates):
+        return _goal_future_value(current_amounts, monthly_contributions, months, rates) - target_amounts
+
+    reached_at_low = shortfall(low) >= 0
+    reachable = shortfall(high) >= 0
+    for _ in range(max_iter):
+        if np.all(high - low < tol):
+            break
+        middle = (low + high) / 2
+        above = shortfall(middle) >= 0
+        high = np.where(above, middle, high)
+        low = np.where(above, low, middle)
+
+    annual_returns = (1 + high) ** 12 - 1
+    annual_returns = np.where(reached_at_low, bounds[0], annual_returns)
+    return np.where(reachable, annual_returns, np.nan)
+
+def solve_goals(goals, as_of=None):
+    """
+    Solve required contributions, and required returns where contributions are planned, for many goals.
+
+    Args:
+    - goals (list of dict or pd.DataFrame): Goals with 'name', 'target_amount', 'current_amount',
+      'expected_return' and either 'months' or 'deadline'; an optional 'monthly_contribution'
+      also solves the required return.
+    - as_of (str or datetime, optional): Reference date for deadlines. Defaults to today.
+
+    Returns:
+    - pd.DataFrame: Goals with 'Months', 'Required Monthly Contribution' and, when
+      contributions are given, 'Required Annual Return'. Empty when there are no goals.
+    """
+    frame = pd.DataFrame(goals)
+    if frame.empty:
+        return pd.DataFrame(columns=['Goal', 'Target Amount', 'Current Amount', 'Months',
+                                     'Required Monthly Contribution'])
+    if "months" in frame:
+        months = frame["months"].to_numpy(dtype=float)
+    else:
+        months = months_until(frame["deadline"], as_of).astype(float)
+
+    result = pd.DataFrame({
+        'Goal': frame['name'],
+        'Target Amount': frame['target_amount'],
+        'Current Amount': frame['current_amount'],
+        'Months': months,
+        'Required Monthly Contribution': required_monthly_contribution(
+            frame['target_amount'], frame['current_amount'], months, frame['expected_return'])
+    })
+    if "monthly_contribution" in frame:
+        result['Required Annual Return'] = required_annual_return(
+            frame['target_amount'], frame['current_amount'], months, frame['monthly_contribution'])
+    return result
+
 def generate_csv_report(data, filename):
     """
     Generate a CSV report.
@@ -306,4 +1176,4 @@ def generate_pdf_report(data, filename):
         body = "\n".join(data[column].astype(str).values)
         pdf.chapter_body(body)
 
-    pdf.output(filename)
\ No newline at end of file
+    pdf.output(filename)
@@ -0,0 +1,151 @@
+# utils/credentials.py
+
+import threading
+from collections.abc import MutableMapping
+
+class CredentialProvider:
+    """
+    Process-wide cache of user records keyed by username.
+
+    The full map is loaded once, on first use, and kept current by refreshing single
+    entries when a user is saved, so login renders read it without touching the database.
+    Each change bumps a version number that callers can use to rebuild objects derived
+    from the map.
+
+    Args:
+    - db (ConnectionManager): Database holding the users table.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._users = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def _load(self):
+        with self._lock:
+            if self._users is None:
+                rows = self.db.query("SELECT username, name, password FROM users")
+                self._users = {username: {"name": name, "password": password} for username, name, password in rows}
+            return self._users
+
+    def usernames(self):
+        """
+        Return the cached username to {'name', 'password'} map.
+
+        The map is shared; callers must not modify it.
+        """
+        return self._users if self._users is not None else self._load()
+
+    def credentials(self):
+        """
+        Return credentials in the format expected by streamlit_authenticator, for one session.
+
+        The usernames entry is a SessionUsers view: it reads users through lookup() and
+        copies a record only when the session first touches it, so building it costs the
+        same for ten users or a hundred thousand, and login state the authenticator writes
+        into a record stays in that session.
+
+        Returns:
+        - dict: {'usernames': SessionUsers}.
+        """
+        return {"usernames": SessionUsers(self)}
+
+    def lookup(self, username):
+        """
+        Return one user's record without loading the full map.
+
+        Args:
+        - username (str): Username to look up.
+
+        Returns:
+        - dict or None: 'username', 'name' and 'password', or None if there is no such user.
+        """
+        users = self._users
+        if users is not None:
+            record = users.get(username)
+            return None if record is None else {"username": username, **record}
+        row = self.db.query_one("SELECT username, name, password FROM users WHERE username = ?", (username,))
+        return None if row is None else {"username": row[0], "name": row[1], "password": row[2]}
+
+    def invalidate(self, username=None):
+        """
+        Refresh one user's cached record from the database, or drop the whole map.
+
+        Args:
+        - username (str, optional): User whose record changed; None reloads everything on next use.
+        """
+        with self._lock:
+            if username is None or self._users is None:
+                self._users = None
+            else:
+                row = self.db.query_one("SELECT name, password FROM users WHERE username = ?", (username,))
+                # Copy on write so readers holding the old map see a consistent snapshot
+                users = dict(self._users)
+                if row is None:
+                    users.pop(username, None)
+                else:
+                    users[username] = {"name": row[0], "password": row[1]}
+                self._users = users
+            self.version += 1
+
+class SessionUsers(MutableMapping):
+    """
+    One session's username to record mapping over a shared CredentialProvider.
+
+    Records are copied from the provider on first access and kept for the session, so
+    writes never reach the shared map. A copied record picks up a new name or password
+    when that user is saved again.
+
+    Args:
+    - provider (CredentialProvider): Source of user records.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._records = {}
+        self._removed = set()
+
+    def __getitem__(self, username):
+        if username in self._removed:
+            raise KeyError(username)
+        record = self._records.get(username)
+        version = self.provider.version
+        if record is None or record[1] != version:
+            user = self.provider.lookup(username)
+            if user is None:
+                if record is None:
+                    raise KeyError(username)
+            else:
+                fields = record[0] if record is not None else {}
+                fields.update(name=user["name"], password=user["password"])
+                record = (fields, version)
+                self._records[username] = record
+        return record[0]
+
+    def __contains__(self, username):
+        return username not in self._removed and (username in self._records
+                                                  or self.provider.lookup(username) is not None)
+
+    def __setitem__(self, username, record):
+        self._removed.discard(username)
+        self._records[username] = (record, self.provider.version)
+
+    def __delitem__(self, username):
+        if username not in self:
+            raise KeyError(username)
+        self._records.pop(username, None)
+        self._removed.add(username)
+
+    def __iter__(self):
+        # Listing every user loads the shared map; login itself only looks users up
+        shared = self.provider.usernames()
+        for username in shared:
+            if username not in self._removed:
+                yield username
+        for username in self._records:
+            if username not in shared and username not in self._removed:
+                yield username
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -1,66 +1,145 @@
-import sqlite3
 import hashlib
+from utils.db import ConnectionManager
+from utils.activity_log import ActivityWriter
+from utils.credentials import CredentialProvider
+
+DB_PATH = 'data/users.db'
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        password TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_activity (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        activity TEXT NOT NULL,
+        FOREIGN KEY (username) REFERENCES users (username)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_user_activity_username_timestamp ON user_activity (username, timestamp)",
+    # Daily rollups of user_activity maintained by utils.activity_rollup
+    """
+    CREATE TABLE IF NOT EXISTS activity_daily (
+        day TEXT NOT NULL,
+        username TEXT NOT NULL,
+        activity TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, username, activity)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_daily (
+        day TEXT NOT NULL,
+        username TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, username)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_totals (
+        day TEXT NOT NULL,
+        activity TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (day, activity)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_rollup_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_activity_archive (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        activity TEXT NOT NULL
+    )
+    """,
+]
+
+# Tables are created once per process, on the first query
+db = ConnectionManager(DB_PATH, SCHEMA)
+
+# Writes activity rows in batches off the request path
+activity_writer = ActivityWriter(db)
+
+# Cached username -> record map used by the login page
+credential_provider = CredentialProvider(db)
 
 def create_connection():
-    conn = sqlite3.connect('data/users.db')
-    return conn
+    return db.connect()
 
 def create_table():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            password TEXT NOT NULL
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_activity (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            timestamp TEXT NOT NULL,
-            activity TEXT NOT NULL,
-            FOREIGN KEY (username) REFERENCES users (username)
-        )
-    """)
-    conn.commit()
-    conn.close()
+    db.initialize()
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 def save_user(name, username, password):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR REPLACE INTO users (username, name, password) VALUES (?, ?, ?)",
-                   (username, name, hash_password(password)))
-    conn.commit()
-    conn.close()
+    db.execute("INSERT OR REPLACE INTO users (username, name, password) VALUES (?, ?, ?)",
+               (username, name, hash_password(password)))
+    credential_provider.invalidate(username)
 
 def get_user():
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users")
-    users = cursor.fetchall()
-    conn.close()
+    users = db.query("SELECT username, name, password FROM users")
     return [{'username': user[0], 'name': user[1], 'password': user[2]} for user in users]
 
+def get_user_by_username(username):
+    return credential_provider.lookup(username)
+
 def save_user_activity(username, activity):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO user_activity (username, timestamp, activity) VALUES (?, datetime('now'), ?)",
-                   (username, activity))
-    conn.commit()
-    conn.close()
+    db.execute("INSERT INTO user_activity (username, timestamp, activity) VALUES (?, datetime('now'), ?)",
+               (username, activity))
+
+def log_activity(username, activity):
+    return activity_writer.log(username, activity)
 
 def get_user_activity(username):
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT timestamp, activity FROM user_activity WHERE username = ? ORDER BY timestamp DESC", (username,))
-    activities = cursor.fetchall()
-    conn.close()
+    activities = db.query("SELECT timestamp, activity FROM user_activity WHERE username = ? ORDER BY timestamp DESC",
+                          (username,))
     return [{'timestamp': activity[0], 'activity': activity[1]} for activity in activities]
 
-# Ensure tables are created
-create_table()
+def get_user_activity_page(username, page_size=50, cursor=None, start=None, end=None):
+    """
+    Fetch one page of a user's activity, newest first.
+
+    Pages are keyed on (timestamp, id) instead of an offset, so every page is a range
+    read on the (username, timestamp) index no matter how deep it is.
+
+    Args:
+    - username (str): User whose activity to read.
+    - page_size (int): Rows per page.
+    - cursor (tuple, optional): 'next_cursor' of the previous page; None for the first page.
+    - start (str, optional): Earliest timestamp to include, e.g. '2024-01-01'.
+    - end (str, optional): Timestamp to stop before, e.g. '2024-02-01'.
+
+    Returns:
+    - dict: 'rows' as a list of dicts with timestamp and activity, and 'next_cursor',
+      None on the last page.
+    """
+    sql = "SELECT id, timestamp, activity FROM user_activity WHERE username = ?"
+    params = [username]
+    if start is not None:
+        sql += " AND timestamp >= ?"
+        params.append(str(start))
+    if end is not None:
+        sql += " AND timestamp < ?"
+        params.append(str(end))
+    if cursor is not None:
+        sql += " AND (timestamp, id) < (?, ?)"
+        params.extend(cursor)
+    sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(page_size + 1)
+
+    rows = db.query(sql, params)
+    page = rows[:page_size]
+    next_cursor = (page[-1][1], page[-1][0]) if len(rows) > page_size else None
+    return {'rows': [{'timestamp': row[1], 'activity': row[2]} for row in page], 'next_cursor': next_cursor}
@@ -0,0 +1,445 @@
+# utils/fundamentals.py
+
+import operator
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.api import get_company_overview, get_income_statement, get_balance_sheet, get_cash_flow
+from utils.api_cache import ENDPOINT_TTLS, DEFAULT_TTL, is_error_response
+from utils.cache import stable_hash
+
+FUNDAMENTALS_PATH = 'data/fundamentals.db'
+
+# Alpha Vantage statement function to fetcher
+STATEMENTS = {
+    "INCOME_STATEMENT": get_income_statement,
+    "BALANCE_SHEET": get_balance_sheet,
+    "CASH_FLOW": get_cash_flow,
+}
+
+# Payload report list to period name
+PERIODS = {"annualReports": "annual", "quarterlyReports": "quarterly"}
+
+# Report fields that are not line items
+REPORT_FIELDS = ("fiscalDateEnding", "reportedCurrency")
+
+# Comparison operators accepted by screen
+OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+def normalize_statement(symbol, statement, payload):
+    """
+    Flatten a statement payload into one row per symbol, period, fiscal date and line item.
+
+    Alpha Vantage reports every amount as a string and missing amounts as 'None'; those
+    become NaN.
+
+    Args:
+    - symbol (str): Stock symbol.
+    - statement (str): Alpha Vantage statement function, e.g. 'INCOME_STATEMENT'.
+    - payload (dict): Decoded statement response.
+
+    Returns:
+    - pd.DataFrame: Columns symbol, statement, period, fiscal_date, item and value (float).
+    """
+    periods, dates, items, raw = [], [], [], []
+    for key, period in PERIODS.items():
+        for report in payload.get(key, []):
+            fiscal_date = report.get("fiscalDateEnding")
+            if not fiscal_date:
+                continue
+            for item, value in report.items():
+                if item in REPORT_FIELDS:
+                    continue
+                periods.append(period)
+                dates.append(fiscal_date)
+                items.append(item)
+                raw.append(value)
+    values = pd.to_numeric(pd.Series(raw, dtype=object), errors="coerce").to_numpy(dtype=float)
+    return pd.DataFrame({
+        "symbol": symbol.upper(),
+        "statement": statement,
+        "period": periods,
+        "fiscal_date": dates,
+        "item": items,
+        "value": values,
+    })
+
+def _divide(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = numerator / denominator
+    return result.where(np.isfinite(result))
+
+def _column(table, item):
+    return table[item] if item in table else pd.Series(np.nan, index=table.index)
+
+def compute_ratios(table, market=None):
+    """
+    Compute financial ratios for every symbol and fiscal period at once.
+
+    Args:
+    - table (pd.DataFrame): Line items by (symbol, fiscal_date), as returned by
+      FundamentalsStore.table.
+    - market (pd.DataFrame, optional): 'market_cap' by symbol, for valuation ratios. The
+      current market cap is used for every period.
+
+    Returns:
+    - pd.DataFrame: Ratios by (symbol, fiscal_date).
+    """
+    revenue = _column(table, "totalRevenue")
+    net_income = _column(table, "netIncome")
+    equity = _column(table, "totalShareholderEquity")
+    debt = _column(table, "shortLongTermDebtTotal").fillna(
+        _column(table, "longTermDebt").fillna(0) + _column(table, "shortTermDebt").fillna(0))
+    free_cash_flow = _column(table, "operatingCashflow") - _column(table, "capitalExpenditures").abs()
+
+    ratios = pd.DataFrame({
+        "gross_margin": _divide(_column(table, "grossProfit"), revenue),
+        "operating_margin": _divide(_column(table, "operatingIncome"), revenue),
+        "net_margin": _divide(net_income, revenue),
+        "roe": _divide(net_income, equity),
+        "roa": _divide(net_income, _column(table, "totalAssets")),
+        "debt_to_equity": _divide(debt, equity),
+        "current_ratio": _divide(_column(table, "totalCurrentAssets"), _column(table, "totalCurrentLiabilities")),
+        "interest_coverage": _divide(_column(table, "operatingIncome"), _column(table, "interestExpense")),
+        "free_cash_flow": free_cash_flow,
+    }, index=table.index)
+
+    # Rows are sorted by symbol then date, so growth compares each period with the one before it
+    previous = revenue.groupby(level="symbol").shift()
+    ratios["revenue_growth"] = _divide(revenue - previous, previous.abs())
+
+    if market is not None and not market.empty:
+        symbols = table.index.get_level_values("symbol")
+        market_cap = pd.Series(market["market_cap"].reindex(symbols).to_numpy(), index=table.index)
+        ratios["market_cap"] = market_cap
+        ratios["fcf_yield"] = _divide(free_cash_flow, market_cap)
+        ratios["earnings_yield"] = _divide(net_income, market_cap)
+    return ratios
+
+class FundamentalsStore:
+    """
+    Local store of normalized financial statements with a cached ratio engine.
+
+    Statements are kept in SQLite as one row per symbol, period, fiscal date and line
+    item. Wide tables and ratios for all stored symbols are built in memory on first use
+    and reused until the stored data changes.
+
+    Args:
+    - path (str): SQLite database file.
+    """
+
+    def __init__(self, path=FUNDAMENTALS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._version = 0
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _create_tables(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                symbol TEXT NOT NULL,
+                period TEXT NOT NULL,
+                fiscal_date TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                item TEXT NOT NULL,
+                value REAL,
+                PRIMARY KEY (symbol, period, fiscal_date, statement, item)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS market_data (
+                symbol TEXT PRIMARY KEY,
+                name TEXT,
+                sector TEXT,
+                market_cap REAL,
+                shares_outstanding REAL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fundamentals_sync (
+                symbol TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                digest TEXT,
+                PRIMARY KEY (symbol, statement)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _mark_synced(self, conn, symbol, statement, payload):
+        conn.execute("INSERT OR REPLACE INTO fundamentals_sync (symbol, statement, synced_at, digest) "
+                     "VALUES (?, ?, ?, ?)", (symbol, statement, time.time(), stable_hash(payload)))
+
+    def _changed(self):
+        # Bumped after commit so cached tables are never tagged with a version they predate
+        with self._lock:
+            self._version += 1
+
+    def merge(self, symbol, statement, payload):
+        """
+        Store a statement payload, replacing the symbol's earlier reports for that statement.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - statement (str): Alpha Vantage statement function.
+        - payload (dict): Decoded statement response.
+
+        Returns:
+        - int: Number of line items stored.
+        """
+        rows = normalize_statement(symbol, statement, payload)
+        symbol = symbol.upper()
+        conn = self._connect()
+        conn.execute("DELETE FROM fundamentals WHERE symbol = ? AND statement = ?", (symbol, statement))
+        conn.executemany(
+            "INSERT OR REPLACE INTO fundamentals (symbol, period, fiscal_date, statement, item, value) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            zip(rows["symbol"], rows["period"], rows["fiscal_date"], rows["statement"], rows["item"],
+                [None if np.isnan(value) else value for value in rows["value"].tolist()])
+        )
+        self._mark_synced(conn, symbol, statement, payload)
+        conn.commit()
+        conn.close()
+        self._changed()
+        return len(rows)
+
+    def merge_overview(self, symbol, overview):
+        """
+        Store market data from a company overview payload.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - overview (dict): Decoded OVERVIEW response.
+        """
+        def number(key):
+            value = pd.to_numeric(overview.get(key), errors="coerce")
+            return None if pd.isna(value) else float(value)
+
+        symbol = symbol.upper()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO market_data (symbol, name, sector, market_cap, shares_outstanding, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (symbol, overview.get("Name"), overview.get("Sector"), number("MarketCapitalization"),
+             number("SharesOutstanding"), time.time())
+        )
+        self._mark_synced(conn, symbol, "OVERVIEW", overview)
+        conn.commit()
+        conn.close()
+        self._changed()
+
+    def merge_payloads(self, symbol, payloads):
+        """
+        Store whichever statement and overview payloads were fetched for a symbol.
+
+        Payloads identical to the stored ones are skipped without a write, so reruns that
+        serve cached responses don't touch the database and cached tables and ratios stay valid.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - payloads (dict): Payload by Alpha Vantage function; errors and exceptions are skipped.
+
+        Returns:
+        - list of str: Functions whose stored data changed.
+        """
+        conn = self._connect()
+        digests = dict(conn.execute("SELECT statement, digest FROM fundamentals_sync WHERE symbol = ?",
+                                    (symbol.upper(),)).fetchall())
+        conn.close()
+
+        stored = []
+        for function, payload in payloads.items():
+            if isinstance(payload, Exception) or is_error_response(payload):
+                continue
+            if digests.get(function) == stable_hash(payload):
+                continue
+            if function == "OVERVIEW":
+                self.merge_overview(symbol, payload)
+            elif function in STATEMENTS:
+                self.merge(symbol, function, payload)
+            else:
+                continue
+            stored.append(function)
+        return stored
+
+    def sync(self, symbol, max_age=None):
+        """
+        Fetch and store any of a symbol's statements and overview older than max_age.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - max_age (float, optional): Seconds before a refresh; defaults to each endpoint TTL.
+
+        Returns:
+        - list of str: Functions whose stored data changed.
+        """
+        conn = self._connect()
+        synced = dict(conn.execute("SELECT statement, synced_at FROM fundamentals_sync WHERE symbol = ?",
+                                   (symbol.upper(),)).fetchall())
+        conn.close()
+        fetchers = {**STATEMENTS, "OVERVIEW": get_company_overview}
+        now = time.time()
+        payloads = {}
+        for function, fetch in fetchers.items():
+            age = max_age if max_age is not None else ENDPOINT_TTLS.get(function, DEFAULT_TTL)
+            if now - synced.get(function, 0) > age:
+                payloads[function] = fetch(symbol)
+        stored = self.merge_payloads(symbol, payloads)
+        unchanged = [function for function, payload in payloads.items() if function not in stored
+                     and not isinstance(payload, Exception) and not is_error_response(payload)]
+        if unchanged:
+            # Fetched but identical, so only the sync time moves on
+            conn = self._connect()
+            conn.executemany("UPDATE fundamentals_sync SET synced_at = ? WHERE symbol = ? AND statement = ?",
+                             [(now, symbol.upper(), function) for function in unchanged])
+            conn.commit()
+            conn.close()
+        return stored
+
+    def symbols(self):
+        """
+        Return the symbols with stored statements.
+        """
+        conn = self._connect()
+        rows = conn.execute("SELECT DISTINCT symbol FROM fundamentals_sync ORDER BY symbol").fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def _cached(self, key, build):
+        with self._lock:
+            version = self._version
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+        value = build()
+        with self._lock:
+            self._cache[key] = (version, value)
+        return value
+
+    def table(self, period="annual"):
+        """
+        Return stored line items as a wide table.
+
+        Args:
+        - period (str): 'annual' or 'quarterly'.
+
+        Returns:
+        - pd.DataFrame: One column per line item, indexed by (symbol, fiscal_date) and sorted.
+        """
+        def build():
+            conn = self._connect()
+            # Items reported on several statements, such as netIncome, keep the income statement value
+            rows = conn.execute("SELECT symbol, fiscal_date, item, value FROM fundamentals WHERE period = ? "
+                                "ORDER BY statement = 'INCOME_STATEMENT' DESC", (period,)).fetchall()
+            conn.close()
+            if not rows:
+                index = pd.MultiIndex.from_arrays([[], []], names=["symbol", "fiscal_date"])
+                return pd.DataFrame(index=index)
+            symbols, dates, items, values = zip(*rows)
+            long = pd.DataFrame({"symbol": symbols, "fiscal_date": pd.to_datetime(dates),
+                                 "item": items, "value": np.array(values, dtype=float)})
+            long = long.drop_duplicates(["symbol", "fiscal_date", "item"])
+            wide = long.set_index(["symbol", "fiscal_date", "item"])["value"].unstack("item")
+            wide.columns.name = None
+            return wide.sort_index()
+        return self._cached(("table", period), build)
+
+    def market(self):
+        """
+        Return stored market data indexed by symbol.
+        """
+        def build():
+            conn = self._connect()
+            market = pd.read_sql_query("SELECT symbol, name, sector, market_cap, shares_outstanding FROM market_data",
+                                       conn, index_col="symbol")
+            conn.close()
+            return market
+        return self._cached(("market",), build)
+
+    def ratios(self, period="annual"):
+        """
+        Return ratios for every stored symbol and fiscal period.
+
+        Returns:
+        - pd.DataFrame: Ratios by (symbol, fiscal_date).
+        """
+        return self._cached(("ratios", period), lambda: compute_ratios(self.table(period), self.market()))
+
+    def latest_ratios(self, period="annual"):
+        """
+        Return each symbol's ratios for its most recent fiscal period.
+
+        Returns:
+        - pd.DataFrame: Ratios indexed by symbol, with the 'fiscal_date' they come from.
+        """
+        def build():
+            ratios = self.ratios(period)
+            if ratios.empty:
+                return ratios.reset_index(level="fiscal_date")
+            symbols = ratios.index.get_level_values("symbol").to_numpy()
+            last = np.append(symbols[1:] != symbols[:-1], True)
+            return ratios[last].reset_index(level="fiscal_date")
+        return self._cached(("latest", period), build)
+
+    def screen(self, conditions, period="annual", sort_by=None, ascending=False, limit=None):
+        """
+        Filter stored symbols by ratio conditions on their latest fiscal period.
+
+        Args:
+        - conditions (list of tuple): (ratio, operator, value) conditions that must all hold,
+          e.g. [('roe', '>', 0.15), ('debt_to_equity', '<', 1.0)].
+        - period (str): 'annual' or 'quarterly'.
+        - sort_by (str, optional): Ratio to sort matches by.
+        - ascending (bool): Sort direction.
+        - limit (int, optional): Maximum number of matches.
+
+        Returns:
+        - pd.DataFrame: Latest ratios of matching symbols.
+        """
+        latest = self.latest_ratios(period)
+        mask = np.ones(len(latest), dtype=bool)
+        for ratio, op, value in conditions:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator: {op}. Use one of {', '.join(OPERATORS)}.")
+            if ratio not in latest:
+                raise ValueError(f"Unknown ratio: {ratio}.")
+            mask &= OPERATORS[op](latest[ratio].to_numpy(), value)
+        matches = latest[mask]
+        if sort_by is not None:
+            matches = matches.sort_values(sort_by, ascending=ascending)
+        return matches if limit is None else matches.head(limit)
+
+_fundamentals_store = None
+_fundamentals_store_lock = threading.Lock()
+
+def get_fundamentals_store():
+    """
+    Return the shared fundamentals store, opening its database on first use.
+    """
+    global _fundamentals_store
+    with _fundamentals_store_lock:
+        if _fundamentals_store is None:
+            _fundamentals_store = FundamentalsStore()
+    return _fundamentals_store
@@ -0,0 +1,161 @@
+# utils/indicators.py
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import MemoCache
+
+TRADING_DAYS = 252
+
+def sma(close, window=20):
+    """
+    Simple moving average.
+    """
+    return close.rolling(window, min_periods=window).mean()
+
+def ema(close, span=20):
+    """
+    Exponential moving average.
+    """
+    return close.ewm(span=span, adjust=False, min_periods=span).mean()
+
+def rsi(close, window=14):
+    """
+    Relative strength index with Wilder smoothing, from 0 to 100.
+    """
+    change = close.diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-change.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+def macd(close, fast=12, slow=26, signal=9):
+    """
+    MACD line, signal line and histogram.
+
+    Returns:
+    - pd.DataFrame: 'MACD', 'MACD Signal' and 'MACD Histogram' columns.
+    """
+    line = close.ewm(span=fast, adjust=False).mean() - close.ewm(span=slow, adjust=False).mean()
+    signal_line = line.ewm(span=signal, adjust=False).mean()
+    return pd.DataFrame({"MACD": line, "MACD Signal": signal_line, "MACD Histogram": line - signal_line})
+
+def bollinger_bands(close, window=20, num_std=2.0):
+    """
+    Bollinger bands around a simple moving average.
+
+    Returns:
+    - pd.DataFrame: 'BB Upper', 'BB Middle' and 'BB Lower' columns.
+    """
+    rolling = close.rolling(window, min_periods=window)
+    middle = rolling.mean()
+    width = num_std * rolling.std(ddof=0)
+    return pd.DataFrame({"BB Upper": middle + width, "BB Middle": middle, "BB Lower": middle - width})
+
+def true_range(high, low, close):
+    """
+    True range: the largest of high - low and the gaps from the previous close.
+    """
+    previous = close.shift()
+    return pd.concat([high - low, (high - previous).abs(), (low - previous).abs()], axis=1).max(axis=1)
+
+def atr(high, low, close, window=14):
+    """
+    Average true range with Wilder smoothing.
+    """
+    return true_range(high, low, close).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+
+def drawdown(close):
+    """
+    Drawdown from the running peak as a negative fraction.
+    """
+    values = close.to_numpy(dtype=float)
+    return pd.Series(values / np.maximum.accumulate(values) - 1, index=close.index)
+
+def rolling_volatility(close, window=20, periods_per_year=TRADING_DAYS):
+    """
+    Annualized rolling standard deviation of log returns.
+    """
+    log_returns = np.log(close).diff()
+    return log_returns.rolling(window, min_periods=window).std() * np.sqrt(periods_per_year)
+
+# Indicator name to (function, default arguments, price columns it needs)
+INDICATORS = {
+    "sma": (sma, (20,), ("Close",)),
+    "ema": (ema, (20,), ("Close",)),
+    "rsi": (rsi, (14,), ("Close",)),
+    "macd": (macd, (12, 26, 9), ("Close",)),
+    "bbands": (bollinger_bands, (20, 2.0), ("Close",)),
+    "atr": (atr, (14,), ("High", "Low", "Close")),
+    "drawdown": (drawdown, (), ("Close",)),
+    "volatility": (rolling_volatility, (20,), ("Close",)),
+}
+
+def parse_indicator(spec):
+    """
+    Parse an indicator spec such as 'sma:50', 'macd:12,26,9' or 'drawdown'.
+
+    Returns:
+    - tuple: Indicator name and a tuple of numeric arguments.
+    """
+    name, _, arguments = spec.strip().lower().partition(":")
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}. Use one of {', '.join(INDICATORS)}.")
+    defaults = INDICATORS[name][1]
+    values = tuple(float(a) if "." in a else int(a) for a in arguments.split(",") if a.strip())
+    return name, values + defaults[len(values):]
+
+# Column labels for indicators returning a single series
+LABELS = {"sma": "SMA", "ema": "EMA", "rsi": "RSI", "atr": "ATR", "drawdown": "Drawdown", "volatility": "Volatility"}
+
+def _label(name, arguments):
+    label = LABELS.get(name, name.upper())
+    return label if not arguments else f"{label} {','.join(str(a) for a in arguments)}"
+
+def _compute(frame, name, arguments):
+    func, _, columns = INDICATORS[name]
+    result = func(*(frame[column] for column in columns), *arguments)
+    if isinstance(result, pd.Series):
+        result = result.rename(_label(name, arguments)).to_frame()
+    elif arguments != INDICATORS[name][1]:
+        result = result.add_suffix(f" {','.join(str(a) for a in arguments)}")
+    return result
+
+_indicator_cache = MemoCache(maxsize=512, max_bytes=256 * 1024 ** 2)
+
+def compute_indicators(frame, specs, symbol=None, version=None):
+    """
+    Compute several indicators over a price frame in one call.
+
+    Price columns are converted to float Series once and shared by every indicator.
+    When symbol and version are given, each indicator is cached under the symbol's history
+    version, so adding an overlay only computes the new indicator.
+
+    Args:
+    - frame (pd.DataFrame): Bars as returned by process_time_series_data.
+    - specs (list of str): Indicator specs such as 'sma:50' or 'rsi:14'.
+    - symbol (str, optional): Symbol the bars belong to, for caching.
+    - version (int, optional): History version of the bars, for caching.
+
+    Returns:
+    - pd.DataFrame: 'Date' plus one or more columns per indicator, aligned with frame.
+    """
+    prices = pd.DataFrame({column: frame[column].astype(float) for column in ("High", "Low", "Close")
+                           if column in frame})
+    results = [frame[["Date"]]]
+    for spec in specs:
+        name, arguments = parse_indicator(spec)
+        key = None if symbol is None or version is None else (symbol.upper(), version, len(frame), name, arguments)
+        found, result = _indicator_cache.get(key) if key else (False, None)
+        if not found:
+            result = _compute(prices, name, arguments)
+            if key:
+                _indicator_cache.set(key, result)
+        results.append(result)
+    return pd.concat(results, axis=1)
+
+def indicator_cache_info():
+    """
+    Report hit and miss counters of the indicator cache.
+    """
+    return _indicator_cache.info()
@@ -0,0 +1,284 @@
+# utils/plan.py
+
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from utils.calculations import (
+    calculate_take_home_pay,
+    calculate_take_home_pay_batch,
+    forecast_salary_growth,
+    forecast_expenses,
+    plan_debt_payoff,
+    debt_payoff_schedule,
+)
+
+def _same_value(old, new):
+    """
+    Check whether an input value is unchanged, including arrays and DataFrames.
+
+    Args:
+    - old: Previous value.
+    - new: New value.
+
+    Returns:
+    - bool: True if the values are known to be equal.
+    """
+    if old is new:
+        return True
+    try:
+        if isinstance(old, (pd.DataFrame, pd.Series)) or isinstance(new, (pd.DataFrame, pd.Series)):
+            return type(old) is type(new) and old.equals(new)
+        if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+            return np.array_equal(old, new)
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+class DependencyGraph:
+    """
+    Lazily evaluated graph of named inputs and computed nodes.
+
+    Changing an input only invalidates the nodes downstream of it; everything else keeps
+    its cached value. Each computed node records how long its last evaluation took.
+    """
+
+    def __init__(self):
+        self._inputs = {}
+        self._nodes = {}
+        self._values = {}
+        self._dependents = defaultdict(set)
+        self.timings = {}
+        self.last_recomputed = []
+
+    def add_input(self, name, value):
+        """
+        Register an input value.
+
+        Args:
+        - name (str): Input name.
+        - value: Initial value.
+        """
+        self._inputs[name] = value
+        self._values[name] = value
+
+    def add_node(self, name, func, dependencies):
+        """
+        Register a computed node.
+
+        Args:
+        - name (str): Node name.
+        - func (callable): Called with the dependency values as positional arguments.
+        - dependencies (list of str): Names of the inputs or nodes the node depends on.
+        """
+        self._nodes[name] = (func, list(dependencies))
+        for dependency in dependencies:
+            self._dependents[dependency].add(name)
+        self.invalidate(name)
+
+    def set_input(self, name, value):
+        """
+        Update an input and invalidate its downstream nodes if the value changed.
+
+        Args:
+        - name (str): Input name.
+        - value: New value.
+
+        Returns:
+        - bool: True if the value changed.
+        """
+        if name not in self._inputs:
+            raise KeyError(f"Unknown input: {name}")
+        if _same_value(self._inputs[name], value):
+            return False
+        self._inputs[name] = value
+        self._values[name] = value
+        for dependent in self._dependents[name]:
+            self.invalidate(dependent)
+        return True
+
+    def update(self, **inputs):
+        """
+        Update several inputs at once.
+
+        Returns:
+        - list of str: Names of the inputs that changed.
+        """
+        return [name for name, value in inputs.items() if self.set_input(name, value)]
+
+    def invalidate(self, name):
+        """
+        Drop the cached value of a node and of everything downstream of it.
+
+        Args:
+        - name (str): Node name.
+        """
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current in self._nodes and current in self._values:
+                del self._values[current]
+            pending.extend(dependent for dependent in self._dependents[current] if dependent in self._values)
+
+    def is_stale(self, name):
+        """
+        Check whether a node needs to be recomputed.
+        """
+        return name not in self._values
+
+    def get(self, name):
+        """
+        Return the value of an input or node, computing stale nodes as needed.
+
+        Args:
+        - name (str): Input or node name.
+
+        Returns:
+        - The value of the input or node.
+        """
+        self.last_recomputed = []
+        return self._evaluate(name)
+
+    def _evaluate(self, name):
+        if name in self._values:
+            return self._values[name]
+        if name not in self._nodes:
+            raise KeyError(f"Unknown node: {name}")
+
+        func, dependencies = self._nodes[name]
+        arguments = [self._evaluate(dependency) for dependency in dependencies]
+        start = time.perf_counter()
+        value = func(*arguments)
+        self.timings[name] = time.perf_counter() - start
+        self.last_recomputed.append(name)
+        self._values[name] = value
+        return value
+
+    def timing_report(self):
+        """
+        Summarize the last evaluation time of every computed node.
+
+        Returns:
+        - pd.DataFrame: Node name, seconds of its last evaluation and whether it is stale.
+        """
+        return pd.DataFrame({
+            'Node': list(self._nodes),
+            'Seconds': [self.timings.get(name, np.nan) for name in self._nodes],
+            'Stale': [self.is_stale(name) for name in self._nodes]
+        })
+
+def _annual_debt_totals(debts, years):
+    """
+    Summarize a debt payoff plan into yearly payments and year-end balances.
+
+    Args:
+    - debts (list of dict): List of debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+    - years (int): Number of years to summarize.
+
+    Returns:
+    - dict: Arrays of yearly 'payments' and year-end 'balance'.
+    """
+    payments = np.zeros(years)
+    balance = np.zeros(years)
+    if not debts:
+        return {"payments": payments, "balance": balance}
+
+    schedule = debt_payoff_schedule(plan_debt_payoff(debts))
+    monthly_payments = schedule["payment"].sum(axis=1)
+    monthly_balance = schedule["new_balance"].sum(axis=1)
+    months = min(len(monthly_payments), years * 12)
+    year_index = np.arange(months) // 12
+    payments += np.bincount(year_index, weights=monthly_payments[:months], minlength=years)[:years]
+    year_ends = np.arange(1, years + 1) * 12 - 1
+    in_schedule = year_ends < len(monthly_balance)
+    balance[in_schedule] = monthly_balance[year_ends[in_schedule]]
+    return {"payments": payments, "balance": balance}
+
+def _investment_growth(initial_investment, investment_options, portfolio, savings):
+    """
+    Grow the invested portfolio with yearly savings added at the start of each year.
+
+    Args:
+    - initial_investment (float): Initial investment amount.
+    - investment_options (dict): Expected annual returns for different investments.
+    - portfolio (dict): Portfolio weight for each investment.
+    - savings (np.ndarray): Amount saved each year.
+
+    Returns:
+    - np.ndarray: Portfolio value at the end of each year.
+    """
+    total_weight = sum(portfolio.values()) or 1
+    rate = sum(portfolio[name] * investment_options[name] for name in portfolio) / total_weight
+    growth = (1 + rate) ** np.arange(1, len(savings) + 1)
+    return growth * (initial_investment + np.cumsum(savings * (1 + rate) / growth))
+
+def build_financial_plan(salary=0.0, deductions=0.0, tax_brackets=(), salary_growth_rate=0.0, raises=None,
+                         bonuses=None, expenses=None, inflation_rates=None, initial_investment=0.0,
+                         investment_options=None, portfolio=None, debts=None, years=10):
+    """
+    Build a financial plan as a dependency graph over the calculation functions.
+
+    Nodes: 'take_home_pay', 'salary_forecast', 'net_income_forecast', 'expense_forecast',
+    'debt_forecast', 'savings', 'investments' and 'net_worth'. Yearly series are indexed
+    by year, starting with the current one.
+
+    Args:
+    - salary (float): Annual gross salary.
+    - deductions (float): Annual deductions.
+    - tax_brackets (list of tuples): Tax brackets as (income_threshold, tax_rate).
+    - salary_growth_rate (float): Expected annual salary growth as a decimal.
+    - raises (dict, optional): Yearly raises as {year: raise_amount}.
+    - bonuses (dict, optional): Yearly bonuses as {year: bonus_amount}.
+    - expenses (dict, optional): Current annual expenses by category.
+    - inflation_rates (dict, optional): Annual inflation rates by category as decimals.
+    - initial_investment (float): Amount invested today.
+    - investment_options (dict, optional): Expected annual returns for different investments.
+    - portfolio (dict, optional): Portfolio weight for each investment.
+    - debts (list of dict, optional): Debts with 'name', 'balance', 'interest_rate', and 'monthly_payment'.
+    - years (int): Number of years to plan.
+
+    Returns:
+    - DependencyGraph: The plan, with one input per argument.
+    """
+    plan = DependencyGraph()
+    inputs = {
+        "salary": salary,
+        "deductions": deductions,
+        "tax_brackets": list(tax_brackets),
+        "salary_growth_rate": salary_growth_rate,
+        "raises": raises or {},
+        "bonuses": bonuses or {},
+        "expenses": expenses or {},
+        "inflation_rates": inflation_rates or {},
+        "initial_investment": initial_investment,
+        "investment_options": investment_options or {},
+        "portfolio": portfolio or {},
+        "debts": debts or [],
+        "years": years,
+    }
+    for name, value in inputs.items():
+        plan.add_input(name, value)
+
+    plan.add_node("take_home_pay", calculate_take_home_pay, ["salary", "deductions", "tax_brackets"])
+    plan.add_node("salary_forecast", forecast_salary_growth,
+                  ["salary", "salary_growth_rate", "raises", "bonuses", "years"])
+    plan.add_node("net_income_forecast",
+                  lambda salaries, deductions, brackets: pd.Series(
+                      calculate_take_home_pay_batch(salaries.to_numpy(), deductions, brackets)["net_salary"]),
+                  ["salary_forecast", "deductions", "tax_brackets"])
+    plan.add_node("expense_forecast",
+                  lambda expenses, rates, years: forecast_expenses(expenses, rates, list(expenses), years),
+                  ["expenses", "inflation_rates", "years"])
+    plan.add_node("debt_forecast", _annual_debt_totals, ["debts", "years"])
+    plan.add_node("savings",
+                  lambda income, expense_forecast, debt: income - expense_forecast.sum(axis=1) - debt["payments"],
+                  ["net_income_forecast", "expense_forecast", "debt_forecast"])
+    plan.add_node("investments",
+                  lambda initial, options, weights, savings: pd.Series(
+                      _investment_growth(initial, options, weights, savings.to_numpy())),
+                  ["initial_investment", "investment_options", "portfolio", "savings"])
+    plan.add_node("net_worth", lambda investments, debt: investments - debt["balance"],
+                  ["investments", "debt_forecast"])
+    return plan
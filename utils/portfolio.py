@@ -0,0 +1,324 @@
+# utils/portfolio.py
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import memoize
+from utils.price_store import get_price_history
+
+TRADING_DAYS = 252
+
+def price_matrix(symbols, function="TIME_SERIES_DAILY", start=None, end=None, history=get_price_history):
+    """
+    Build a date x symbol matrix of closing prices from stored price histories.
+
+    Adjusted closes are used when the series has them. Only dates traded by every
+    symbol are kept.
+
+    Args:
+    - symbols (list of str): Stock symbols.
+    - function (str): Alpha Vantage series function.
+    - start (str, optional): First date to include.
+    - end (str, optional): Last date to include.
+    - history (callable): Called as history(symbol, function=...) to get a price frame.
+
+    Returns:
+    - pd.DataFrame: Prices indexed by date with one column per symbol.
+    """
+    columns = {}
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        frame = history(symbol, function=function)
+        price = "Adjusted Close" if "Adjusted Close" in frame else "Close"
+        columns[symbol] = pd.Series(frame[price].to_numpy(dtype=float), index=pd.DatetimeIndex(frame["Date"]))
+    prices = pd.DataFrame(columns).dropna()
+    return prices.loc[start:end]
+
+def return_statistics(prices, periods_per_year=TRADING_DAYS, shrinkage=0.0):
+    """
+    Compute the return matrix and annualized mean returns and covariance.
+
+    Args:
+    - prices (pd.DataFrame): Date x symbol price matrix.
+    - periods_per_year (int): Return periods per year, for annualizing.
+    - shrinkage (float): Weight between 0 and 1 pulling the covariance toward its
+      diagonal, which steadies the estimate when there are many assets.
+
+    Returns:
+    - dict: 'returns' DataFrame of simple returns, 'mean' Series and 'covariance' DataFrame.
+    """
+    values = prices.to_numpy(dtype=float)
+    returns = values[1:] / values[:-1] - 1
+    mean = returns.mean(axis=0) * periods_per_year
+    centered = returns - returns.mean(axis=0)
+    covariance = centered.T @ centered / max(len(returns) - 1, 1) * periods_per_year
+    if shrinkage:
+        covariance = (1 - shrinkage) * covariance + shrinkage * np.diag(np.diag(covariance))
+    symbols = prices.columns
+    return {
+        "returns": pd.DataFrame(returns, index=prices.index[1:], columns=symbols),
+        "mean": pd.Series(mean, index=symbols),
+        "covariance": pd.DataFrame(covariance, index=symbols, columns=symbols),
+    }
+
+def portfolio_performance(weights, mean, covariance, risk_free_rate=0.0):
+    """
+    Compute expected return, volatility and Sharpe ratio for one or many weightings.
+
+    Args:
+    - weights (array-like): Weights of shape (n_assets,) or (n_portfolios, n_assets).
+    - mean (array-like): Annualized mean returns.
+    - covariance (array-like): Annualized covariance matrix.
+    - risk_free_rate (float): Annual risk-free rate.
+
+    Returns:
+    - dict: 'return', 'volatility' and 'sharpe' arrays, scalars for a single weighting.
+    """
+    weights = np.asarray(weights, dtype=float)
+    mean = np.asarray(mean, dtype=float)
+    covariance = np.asarray(covariance, dtype=float)
+    expected = weights @ mean
+    variance = np.einsum("...i,...i->...", weights @ covariance, weights)
+    volatility = np.sqrt(np.maximum(variance, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (expected - risk_free_rate) / volatility
+    return {"return": expected, "volatility": volatility, "sharpe": sharpe}
+
+def random_portfolios(mean, covariance, n_portfolios=50_000, chunk_size=10_000, risk_free_rate=0.0, seed=None):
+    """
+    Evaluate random long-only weightings in vectorized batches.
+
+    Weights are drawn uniformly from the simplex, chunk by chunk, so memory stays
+    bounded by chunk_size x n_assets.
+
+    Args:
+    - mean (pd.Series or array-like): Annualized mean returns.
+    - covariance (pd.DataFrame or array-like): Annualized covariance matrix.
+    - n_portfolios (int): Number of weightings to evaluate.
+    - chunk_size (int): Weightings evaluated per batch.
+    - risk_free_rate (float): Annual risk-free rate.
+    - seed (int, optional): Seed for reproducible draws.
+
+    Returns:
+    - dict: 'portfolios' DataFrame (Return, Volatility, Sharpe) and 'weights' array of
+      shape (n_portfolios, n_assets).
+    """
+    mean = np.asarray(mean, dtype=float)
+    covariance = np.asarray(covariance, dtype=float)
+    rng = np.random.default_rng(seed)
+    weights = np.empty((n_portfolios, len(mean)))
+    expected = np.empty(n_portfolios)
+    volatility = np.empty(n_portfolios)
+    for start in range(0, n_portfolios, chunk_size):
+        stop = min(start + chunk_size, n_portfolios)
+        chunk = rng.exponential(size=(stop - start, len(mean)))
+        chunk /= chunk.sum(axis=1, keepdims=True)
+        performance = portfolio_performance(chunk, mean, covariance)
+        weights[start:stop] = chunk
+        expected[start:stop] = performance["return"]
+        volatility[start:stop] = performance["volatility"]
+    portfolios = pd.DataFrame({"Return": expected, "Volatility": volatility,
+                               "Sharpe": (expected - risk_free_rate) / volatility})
+    return {"portfolios": portfolios, "weights": weights}
+
+def project_to_simplex(weights, max_weight=1.0):
+    """
+    Project rows of weights onto the long-only, fully invested set.
+
+    The projection clips weights - shift to [0, max_weight], where the shift makes each
+    row sum to 1. Without a cap this is the exact sort-based projection. With a cap the
+    row total is piecewise linear in the shift, so sorting its breakpoints and taking
+    running sums gives the exact shift. Either way every row is handled at once.
+
+    Args:
+    - weights (np.ndarray): Weights of shape (n_assets,) or (n_portfolios, n_assets).
+    - max_weight (float): Upper bound for any single weight.
+
+    Returns:
+    - np.ndarray: Projected weights of shape (n_portfolios, n_assets).
+
+    Raises:
+    - ValueError: If max_weight is too small for the weights to sum to 1.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    rows, n_assets = weights.shape
+    if max_weight * n_assets < 1 - 1e-12:
+        raise ValueError(f"max_weight {max_weight:g} is below 1/{n_assets}; "
+                         f"{n_assets} assets cannot be fully invested under it")
+
+    if max_weight >= 1:
+        ordered = -np.sort(-weights, axis=1)
+        excess = np.cumsum(ordered, axis=1) - 1
+        counts = np.arange(1, n_assets + 1)
+        active = (ordered - excess / counts > 0).sum(axis=1, keepdims=True)
+        shift = np.take_along_axis(excess, active - 1, axis=1) / active
+        return np.maximum(weights - shift, 0.0)
+
+    # The row total of clip(w - shift, 0, max_weight) falls linearly between breakpoints
+    # where a weight leaves the cap (shift = w - max_weight) or reaches 0 (shift = w)
+    ordered = np.sort(weights, axis=1)
+    breakpoints = np.concatenate((ordered - max_weight, ordered), axis=1)
+    order = np.argsort(breakpoints, axis=1, kind="stable")
+    flat_order = (order + (np.arange(rows) * 2 * n_assets)[:, np.newaxis]).ravel()
+    shifts = breakpoints.ravel()[flat_order].reshape(rows, 2 * n_assets)
+    # Weights still above 0 and still at the cap once the shift passes each breakpoint
+    is_floor = order >= n_assets
+    positive = n_assets - np.cumsum(is_floor, axis=1)
+    capped = n_assets - np.cumsum(~is_floor, axis=1)
+
+    # Sums of the largest k weights, to total the weights between 0 and the cap
+    top_sums = np.zeros((rows, n_assets + 1))
+    top_sums[:, 1:] = np.cumsum(ordered[:, ::-1], axis=1)
+    flat_sums = top_sums.ravel()
+    row_starts = (np.arange(rows) * (n_assets + 1))[:, np.newaxis]
+    totals = (max_weight * capped + flat_sums[row_starts + positive] - flat_sums[row_starts + capped]
+              - shifts * (positive - capped))
+
+    # Interpolate between the last breakpoint with a total of at least 1 and the next one
+    low = np.maximum((totals >= 1).sum(axis=1) - 1, 0)
+    index = np.arange(rows)
+    low_shift, high_shift = shifts[index, low], shifts[index, low + 1]
+    low_total, high_total = totals[index, low], totals[index, low + 1]
+    shift = low_shift + (low_total - 1) * (high_shift - low_shift) / (low_total - high_total)
+    return np.clip(weights - shift[:, np.newaxis], 0.0, max_weight)
+
+def _minimize_mean_variance(mean, covariance, risk_aversions, max_weight=1.0, iterations=1000, tolerance=1e-9,
+                            initial=None):
+    """
+    Solve min w'Cw - r * mu'w over long-only weights for a batch of risk aversions r.
+
+    Uses accelerated projected gradient descent with adaptive restarts; each iteration is
+    one matrix product across the whole batch. initial warm-starts every problem from feasible weights,
+    e.g. a nearby solution; the default is equal weights.
+    """
+    n_assets = len(mean)
+    step = 1.0 / (2 * np.linalg.eigvalsh(covariance)[-1] + 1e-12)
+    if initial is None:
+        weights = np.full((len(risk_aversions), n_assets), 1.0 / n_assets)
+    else:
+        weights = np.array(np.broadcast_to(initial, (len(risk_aversions), n_assets)), dtype=float)
+    momentum = weights.copy()
+    linear = np.outer(risk_aversions, mean)
+    t = np.ones((len(risk_aversions), 1))
+    for _ in range(iterations):
+        gradient = 2 * momentum @ covariance - linear
+        updated = project_to_simplex(momentum - step * gradient, max_weight)
+        # Restart the momentum of problems where it points against the last step
+        t = np.where(((momentum - updated) * (updated - weights)).sum(axis=1, keepdims=True) > 0, 1.0, t)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + (t - 1) / t_next * (updated - weights)
+        converged = np.abs(updated - weights).max() < tolerance
+        weights, t = updated, t_next
+        if converged:
+            break
+    return weights
+
+def min_variance_portfolio(mean, covariance, max_weight=1.0, risk_free_rate=0.0):
+    """
+    Find the long-only weighting with the lowest volatility.
+
+    Args:
+    - mean (pd.Series): Annualized mean returns.
+    - covariance (pd.DataFrame): Annualized covariance matrix.
+    - max_weight (float): Upper bound for any single weight.
+    - risk_free_rate (float): Annual risk-free rate.
+
+    Returns:
+    - dict: 'weights' Series plus 'return', 'volatility' and 'sharpe'.
+    """
+    mu = np.asarray(mean, dtype=float)
+    weights = _minimize_mean_variance(mu, np.asarray(covariance, dtype=float), np.zeros(1), max_weight)[0]
+    return _portfolio_result(weights, mean, covariance, risk_free_rate)
+
+def max_sharpe_portfolio(mean, covariance, max_weight=1.0, risk_free_rate=0.0, n_candidates=50):
+    """
+    Find the long-only weighting with the highest Sharpe ratio.
+
+    The tangency portfolio lies on the efficient frontier, so a batch of frontier
+    points is solved at once and the grid is then refined around the best point.
+
+    Args:
+    - mean (pd.Series): Annualized mean returns.
+    - covariance (pd.DataFrame): Annualized covariance matrix.
+    - max_weight (float): Upper bound for any single weight.
+    - risk_free_rate (float): Annual risk-free rate.
+    - n_candidates (int): Frontier points solved in each pass.
+
+    Returns:
+    - dict: 'weights' Series plus 'return', 'volatility' and 'sharpe'.
+    """
+    mu = np.asarray(mean, dtype=float)
+    cov = np.asarray(covariance, dtype=float)
+    aversions = _risk_aversion_grid(mu, cov, n_candidates)
+    weights = _minimize_mean_variance(mu, cov, aversions, max_weight)
+    best = _refine_max_sharpe(mu, cov, aversions, weights, max_weight, risk_free_rate)
+    return _portfolio_result(best, mean, covariance, risk_free_rate)
+
+def _refine_max_sharpe(mean, covariance, aversions, weights, max_weight, risk_free_rate):
+    """
+    Refine the best-Sharpe point of a solved frontier grid with one finer pass.
+
+    The finer grid spans the neighbours of the best point and every problem starts from
+    its weights, so the pass converges in few iterations.
+    """
+    sharpe = portfolio_performance(weights, mean, covariance, risk_free_rate)["sharpe"]
+    best = int(np.nanargmax(sharpe))
+    low, high = aversions[max(best - 1, 0)], aversions[min(best + 1, len(aversions) - 1)]
+    refined = _minimize_mean_variance(mean, covariance, np.linspace(low, high, len(aversions)), max_weight,
+                                      initial=weights[best])
+    sharpe = portfolio_performance(refined, mean, covariance, risk_free_rate)["sharpe"]
+    return refined[int(np.nanargmax(sharpe))]
+
+def _risk_aversion_grid(mean, covariance, n_points):
+    # From the minimum-variance end (0) to a value where expected return dominates
+    scale = 2 * np.linalg.eigvalsh(covariance)[-1] / max(np.ptp(mean), 1e-12)
+    return np.concatenate([[0.0], np.geomspace(scale * 1e-3, scale * 1e2, n_points - 1)])
+
+def _portfolio_result(weights, mean, covariance, risk_free_rate):
+    performance = portfolio_performance(weights, mean, covariance, risk_free_rate)
+    return {
+        "weights": pd.Series(weights, index=getattr(mean, "index", None)),
+        "return": float(performance["return"]),
+        "volatility": float(performance["volatility"]),
+        "sharpe": float(performance["sharpe"]),
+    }
+
+@memoize(maxsize=32)
+def efficient_frontier(mean, covariance, n_points=50, max_weight=1.0, risk_free_rate=0.0):
+    """
+    Trace the long-only efficient frontier.
+
+    All frontier points are solved together as one batch, one per risk aversion, so
+    the cost grows with n_points x n_assets^2 per iteration and stays interactive for
+    hundreds of assets.
+
+    Args:
+    - mean (pd.Series): Annualized mean returns.
+    - covariance (pd.DataFrame): Annualized covariance matrix.
+    - n_points (int): Number of frontier points.
+    - max_weight (float): Upper bound for any single weight.
+    - risk_free_rate (float): Annual risk-free rate.
+
+    Returns:
+    - dict: 'frontier' DataFrame (Return, Volatility, Sharpe) sorted by volatility,
+      'weights' DataFrame with one row per point, and the 'min_variance' and
+      'max_sharpe' portfolios.
+    """
+    mu = np.asarray(mean, dtype=float)
+    cov = np.asarray(covariance, dtype=float)
+    aversions = _risk_aversion_grid(mu, cov, n_points)
+    weights = _minimize_mean_variance(mu, cov, aversions, max_weight)
+    max_sharpe = _refine_max_sharpe(mu, cov, aversions, weights, max_weight, risk_free_rate)
+    performance = portfolio_performance(weights, mu, cov, risk_free_rate)
+    frontier = pd.DataFrame({"Return": performance["return"], "Volatility": performance["volatility"],
+                             "Sharpe": performance["sharpe"]})
+    frontier = frontier.sort_values("Volatility", kind="stable")
+    # Drop points that repeat once the weights hit their bounds
+    unique = ~frontier[["Return", "Volatility"]].round(10).duplicated().to_numpy()
+    order = frontier.index.to_numpy()[unique]
+    weights = pd.DataFrame(weights[order], columns=getattr(mean, "index", None))
+    return {
+        "frontier": frontier.iloc[unique].reset_index(drop=True),
+        "weights": weights,
+        "min_variance": _portfolio_result(weights.iloc[0].to_numpy(), mean, covariance, risk_free_rate),
+        "max_sharpe": _portfolio_result(max_sharpe, mean, covariance, risk_free_rate),
+    }
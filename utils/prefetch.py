@@ -0,0 +1,185 @@
+# utils/prefetch.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+
+from config import ALPHA_VANTAGE_API_KEY
+from utils.api import BASE_URL, get_session, get_response_cache
+from utils.api_cache import is_error_response
+
+# Extra request parameters by endpoint
+ENDPOINT_PARAMS = {
+    "TIME_SERIES_DAILY": {"outputsize": "compact"},
+    "TIME_SERIES_DAILY_ADJUSTED": {"outputsize": "compact"},
+    "TIME_SERIES_INTRADAY": {"interval": "5min", "outputsize": "compact"},
+}
+
+# HTTP statuses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how many requests start per minute.
+
+    Args:
+    - requests_per_minute (float): Sustained request rate.
+    - burst (int, optional): Most requests allowed back to back. Defaults to 1.
+    """
+
+    def __init__(self, requests_per_minute, burst=1):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available, then take it.
+
+        Returns:
+        - float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, seconds):
+        """
+        Hold back every worker after the provider signals throttling.
+
+        Args:
+        - seconds (float): Time to add before the next token.
+        """
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+def build_params(symbol, endpoint, api_key=ALPHA_VANTAGE_API_KEY):
+    """
+    Build Alpha Vantage request parameters for one symbol and endpoint.
+
+    Args:
+    - symbol (str): Stock symbol.
+    - endpoint (str): Alpha Vantage function name.
+    - api_key (str): API key.
+
+    Returns:
+    - dict: Request parameters.
+    """
+    return {"function": endpoint, "symbol": symbol, **ENDPOINT_PARAMS.get(endpoint, {}), "apikey": api_key}
+
+def _fetch_with_retry(session, base_url, params, bucket, max_retries, backoff, timeout):
+    """
+    Fetch one request through the rate limiter, backing off on throttling.
+
+    Returns:
+    - tuple: (payload, attempts, error message or None).
+    """
+    error = None
+    for attempt in range(1, max_retries + 2):
+        bucket.acquire()
+        try:
+            response = session.get(base_url, params=params, timeout=timeout)
+            if response.status_code in RETRY_STATUSES:
+                error = f"HTTP {response.status_code}"
+            else:
+                response.raise_for_status()
+                payload = response.json()
+                if not any(key in payload for key in ("Note", "Information")):
+                    return payload, attempt, payload.get("Error Message")
+                error = "Throttled"
+        except (requests.RequestException, ValueError) as exc:
+            error = str(exc)
+
+        delay = backoff * 2 ** (attempt - 1) * (1 + random.random())
+        bucket.penalize(delay)
+    return None, max_retries + 1, error
+
+def prefetch(symbols, endpoints=("TIME_SERIES_DAILY",), requests_per_minute=75, burst=5, max_workers=4,
+             max_retries=3, backoff=2.0, timeout=30, skip_fresh=True, base_url=BASE_URL,
+             api_key=ALPHA_VANTAGE_API_KEY, session=None, cache=None):
+    """
+    Fetch many symbols and endpoints into the local response cache under a rate limit.
+
+    Requests share a pooled HTTP session and start no faster than the token bucket allows.
+    Throttling responses and retryable HTTP errors are retried with exponential backoff,
+    which also slows every other worker. Each result is stored as soon as it arrives.
+
+    Args:
+    - symbols (list of str): Stock symbols.
+    - endpoints (list of str): Alpha Vantage function names to fetch for every symbol.
+    - requests_per_minute (float): Provider request limit.
+    - burst (int): Most requests allowed back to back.
+    - max_workers (int): Number of concurrent requests.
+    - max_retries (int): Retries per request after the first attempt.
+    - backoff (float): Base delay in seconds for retries.
+    - timeout (float): Seconds to wait for each response.
+    - skip_fresh (bool): Skip requests whose cached response is still fresh.
+    - base_url (str): API endpoint, e.g. a local stub server for testing.
+    - api_key (str): API key.
+    - session (requests.Session, optional): HTTP session; defaults to the shared pooled one.
+    - cache (ResponseCache, optional): Store receiving the results; defaults to the shared one.
+
+    Returns:
+    - dict: 'results' DataFrame with one row per request (symbol, endpoint, status,
+      attempts, seconds) and 'summary' with request counts, elapsed seconds and throughput.
+    """
+    session = session or get_session(pool_size=max_workers)
+    cache = cache or get_response_cache()
+    bucket = TokenBucket(requests_per_minute, burst)
+    jobs = [(symbol, endpoint) for symbol in dict.fromkeys(symbols) for endpoint in dict.fromkeys(endpoints)]
+
+    rows = []
+    pending = []
+    for symbol, endpoint in jobs:
+        params = build_params(symbol, endpoint, api_key)
+        if skip_fresh and cache.is_fresh(params):
+            rows.append({"symbol": symbol, "endpoint": endpoint, "status": "cached", "attempts": 0, "seconds": 0.0})
+        else:
+            pending.append((symbol, endpoint, params))
+
+    def run(symbol, endpoint, params):
+        start = time.perf_counter()
+        payload, attempts, error = _fetch_with_retry(session, base_url, params, bucket, max_retries, backoff, timeout)
+        if payload is not None and not is_error_response(payload):
+            cache.store(params, payload)
+            status = "fetched"
+        else:
+            status = "failed"
+        return {"symbol": symbol, "endpoint": endpoint, "status": status, "attempts": attempts,
+                "seconds": time.perf_counter() - start, "error": error}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run, *job) for job in pending]
+        for future in as_completed(futures):
+            rows.append(future.result())
+    elapsed = time.perf_counter() - start
+
+    results = pd.DataFrame(rows, columns=["symbol", "endpoint", "status", "attempts", "seconds", "error"])
+    fetched = int((results["status"] == "fetched").sum())
+    return {
+        "results": results,
+        "summary": {
+            "requests": int(results["attempts"].sum()),
+            "fetched": fetched,
+            "cached": int((results["status"] == "cached").sum()),
+            "failed": int((results["status"] == "failed").sum()),
+            "seconds": elapsed,
+            "fetched_per_second": fetched / elapsed if elapsed > 0 else 0.0,
+        }
+    }
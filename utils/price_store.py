@@ -0,0 +1,266 @@
+# utils/price_store.py
+
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from utils.api import get_stock_data, process_time_series_data
+from utils.api_cache import ENDPOINT_TTLS, DEFAULT_TTL
+
+STORE_PATH = 'data/price_history.db'
+
+# Frame column to table column
+PRICE_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adjusted Close": "adjusted_close",
+    "Volume": "volume",
+    "Dividend Amount": "dividend_amount",
+    "Split Coefficient": "split_coefficient",
+}
+
+class PriceHistoryStore:
+    """
+    Local per-symbol price history kept in SQLite and synced incrementally.
+
+    The first sync of a symbol downloads the full history. Later syncs fetch only the
+    compact window and merge new or corrected bars, deduplicating on date. Each symbol
+    has a version number that increases whenever its stored bars change.
+
+    Args:
+    - path (str): SQLite database file.
+    - fetch (callable): Called as fetch(symbol, function=..., outputsize=...) to get a payload.
+    """
+
+    def __init__(self, path=STORE_PATH, fetch=get_stock_data):
+        self.path = path
+        self.fetch = fetch
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._create_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _create_tables(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS price_history (
+                symbol TEXT NOT NULL,
+                function TEXT NOT NULL,
+                date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                adjusted_close REAL,
+                volume INTEGER,
+                dividend_amount REAL,
+                split_coefficient REAL,
+                PRIMARY KEY (symbol, function, date)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS price_sync (
+                symbol TEXT NOT NULL,
+                function TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (symbol, function)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _symbol_lock(self, symbol, function):
+        with self._locks_lock:
+            return self._locks.setdefault((symbol, function), threading.Lock())
+
+    def sync_state(self, symbol, function="TIME_SERIES_DAILY"):
+        """
+        Return when a symbol was last synced and its history version.
+
+        Returns:
+        - dict or None: 'synced_at' timestamp and 'version', or None if never synced.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT synced_at, version FROM price_sync WHERE symbol = ? AND function = ?",
+                           (symbol.upper(), function)).fetchone()
+        conn.close()
+        return None if row is None else {"synced_at": row[0], "version": row[1]}
+
+    def version(self, symbol, function="TIME_SERIES_DAILY"):
+        """
+        Return the history version of a symbol, 0 if it has never been synced.
+        """
+        state = self.sync_state(symbol, function)
+        return 0 if state is None else state["version"]
+
+    def last_date(self, symbol, function="TIME_SERIES_DAILY"):
+        """
+        Return the date of the newest stored bar as text, or None if none are stored.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT MAX(date) FROM price_history WHERE symbol = ? AND function = ?",
+                           (symbol.upper(), function)).fetchone()
+        conn.close()
+        return row[0]
+
+    def merge(self, symbol, frame, function="TIME_SERIES_DAILY"):
+        """
+        Merge bars into the store, replacing bars whose values changed.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - frame (pd.DataFrame): Bars as returned by process_time_series_data.
+        - function (str): Alpha Vantage series function.
+
+        Returns:
+        - int: Number of bars inserted or updated.
+        """
+        symbol = symbol.upper()
+        columns = [column for column in frame.columns if column in PRICE_COLUMNS]
+        names = [PRICE_COLUMNS[column] for column in columns]
+        dates = pd.DatetimeIndex(frame["Date"])
+        date_text = np.where(dates.normalize() == dates, dates.strftime("%Y-%m-%d"), dates.strftime("%Y-%m-%d %H:%M:%S"))
+        values = [frame[column].to_numpy().tolist() for column in columns]
+        rows = zip([symbol] * len(frame), [function] * len(frame), date_text.tolist(), *values)
+
+        placeholders = ", ".join("?" * (len(names) + 3))
+        updates = ", ".join(f"{name} = excluded.{name}" for name in names)
+        changed = " OR ".join(f"{name} IS NOT excluded.{name}" for name in names) or "0"
+        conn = self._connect()
+        before = conn.total_changes
+        conn.executemany(
+            f"INSERT INTO price_history (symbol, function, date, {', '.join(names)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (symbol, function, date) DO UPDATE SET {updates} WHERE {changed}",
+            rows
+        )
+        merged = conn.total_changes - before
+        conn.execute("""
+            INSERT INTO price_sync (symbol, function, synced_at, version) VALUES (?, ?, ?, ?)
+            ON CONFLICT (symbol, function) DO UPDATE SET
+                synced_at = excluded.synced_at,
+                version = version + (CASE WHEN ? > 0 THEN 1 ELSE 0 END)
+        """, (symbol, function, time.time(), 1, merged))
+        conn.commit()
+        conn.close()
+        return merged
+
+    def read(self, symbol, function="TIME_SERIES_DAILY", start=None, end=None):
+        """
+        Read stored bars for a symbol, oldest first.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - function (str): Alpha Vantage series function.
+        - start (str, optional): First date to include.
+        - end (str, optional): Last date to include.
+
+        Returns:
+        - pd.DataFrame or None: Bars in the process_time_series_data format, or None if none are stored.
+        """
+        query = "SELECT * FROM price_history WHERE symbol = ? AND function = ?"
+        params = [symbol.upper(), function]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(str(start))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(str(end))
+        conn = self._connect()
+        cursor = conn.execute(query + " ORDER BY date", params)
+        rows = cursor.fetchall()
+        table_columns = [description[0] for description in cursor.description]
+        conn.close()
+        if not rows:
+            return None
+
+        data = dict(zip(table_columns, zip(*rows)))
+        frame = {"Date": np.array(data["date"], dtype="datetime64[ns]")}
+        for column, name in PRICE_COLUMNS.items():
+            values = data[name]
+            if all(value is None for value in values):
+                continue
+            frame[column] = np.array(values, dtype=np.int64 if column == "Volume" else np.float64)
+        return pd.DataFrame(frame)
+
+    def _has_gap(self, symbol, frame, function):
+        """
+        Check whether a fetched window starts after the newest stored bar.
+        """
+        last = self.last_date(symbol, function)
+        return last is not None and pd.Timestamp(frame["Date"].min()) > pd.Timestamp(last)
+
+    def sync(self, symbol, function="TIME_SERIES_DAILY", max_age=None):
+        """
+        Bring a symbol's history up to date and return it.
+
+        Downloads the full history on first use. Afterwards, once the last sync is older
+        than max_age, fetches the compact window and merges it. If the compact window
+        starts after the newest stored bar, bars in between would be missing, so the full
+        history is fetched instead. If a refresh fails but history is stored, the stored
+        history is returned.
+
+        Args:
+        - symbol (str): Stock symbol.
+        - function (str): Alpha Vantage series function.
+        - max_age (float, optional): Seconds before a refresh; defaults to the endpoint TTL.
+
+        Returns:
+        - pd.DataFrame: Stored bars, oldest first.
+
+        Raises:
+        - ValueError: If no history is stored and the backfill fails.
+        - requests.RequestException: If no history is stored and the backfill request fails.
+        """
+        max_age = ENDPOINT_TTLS.get(function, DEFAULT_TTL) if max_age is None else max_age
+        with self._symbol_lock(symbol.upper(), function):
+            state = self.sync_state(symbol, function)
+            if state is None or time.time() - state["synced_at"] > max_age:
+                outputsize = "full" if state is None else "compact"
+                try:
+                    payload = self.fetch(symbol, function=function, outputsize=outputsize)
+                    frame = process_time_series_data(payload)
+                    if frame is not None and outputsize == "compact" and self._has_gap(symbol, frame, function):
+                        full_frame = process_time_series_data(self.fetch(symbol, function=function, outputsize="full"))
+                        frame = frame if full_frame is None else full_frame
+                except (requests.RequestException, ValueError):
+                    if state is None:
+                        raise
+                    frame = None
+                if frame is not None:
+                    self.merge(symbol, frame, function)
+                elif state is None:
+                    raise ValueError(payload.get("Error Message") or payload.get("Note")
+                                     or payload.get("Information") or f"No price history for {symbol}")
+        return self.read(symbol, function)
+
+_price_store = None
+_price_store_lock = threading.Lock()
+
+def get_price_store():
+    """
+    Return the shared price history store, opening its database on first use.
+    """
+    global _price_store
+    with _price_store_lock:
+        if _price_store is None:
+            _price_store = PriceHistoryStore()
+    return _price_store
+
+def get_price_history(symbol, function="TIME_SERIES_DAILY", max_age=None):
+    """
+    Return a symbol's price history from the local store, syncing it when stale.
+    """
+    return get_price_store().sync(symbol, function, max_age)
@@ -0,0 +1,232 @@
+# utils/symbol_index.py
+
+import bisect
+import csv
+import os
+import re
+import threading
+
+from utils.api import search_symbol, get_response_cache
+from utils.api_cache import is_error_response
+
+LISTING_PATH = 'data/listing_status.csv'
+
+# SYMBOL_SEARCH match field to record field
+MATCH_FIELDS = {
+    "1. symbol": "symbol",
+    "2. name": "name",
+    "3. type": "type",
+    "4. region": "region",
+    "8. currency": "currency",
+}
+
+# Base score by how the query matched
+SCORES = {
+    "symbol": 100,
+    "symbol_prefix": 80,
+    "name_prefix": 60,
+    "word_prefix": 40,
+    "fuzzy": 20,
+}
+
+def normalize(text):
+    """
+    Lowercase text and replace punctuation other than dots with spaces.
+    """
+    return " ".join(re.sub(r"[^a-z0-9. ]", " ", str(text).lower()).split())
+
+def _deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def records_from_search(payload):
+    """
+    Convert a SYMBOL_SEARCH payload into symbol records.
+
+    Args:
+    - payload (dict): Decoded SYMBOL_SEARCH response.
+
+    Returns:
+    - list of dict: Records with symbol, name, type, region and currency.
+    """
+    return [{field: match.get(key, "") for key, field in MATCH_FIELDS.items()}
+            for match in payload.get("bestMatches", [])]
+
+def records_from_listing(path=LISTING_PATH):
+    """
+    Read symbol records from a listing file in the Alpha Vantage LISTING_STATUS CSV format.
+
+    Args:
+    - path (str): CSV file with symbol, name, exchange, assetType and status columns.
+
+    Returns:
+    - list of dict: Records of active listings with symbol, name, type, region and exchange.
+    """
+    with open(path, newline="") as f:
+        return [{"symbol": row["symbol"], "name": row.get("name", ""), "type": row.get("assetType", ""),
+                 "region": "United States", "exchange": row.get("exchange", "")}
+                for row in csv.DictReader(f) if row.get("symbol") and row.get("status", "Active") == "Active"]
+
+class SymbolIndex:
+    """
+    In-memory symbol search over tickers and company names.
+
+    Tickers, full names and name words are kept in sorted lists, so a prefix lookup is a
+    binary search plus a scan of the matching range. Queries that find too few prefix
+    matches fall back to fuzzy matching within one edit, using a table of single-character
+    deletions built with the index.
+
+    Args:
+    - records (list of dict, optional): Initial records, each with at least 'symbol' and 'name'.
+    """
+
+    def __init__(self, records=()):
+        self.records = []
+        self._by_symbol = {}
+        self._symbols = []
+        self._names = []
+        self._words = []
+        self._term_ids = {}
+        self._deletes = {}
+        self._lock = threading.Lock()
+        self.add(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, records):
+        """
+        Add records to the index; a record for a symbol already indexed is skipped.
+
+        Args:
+        - records (list of dict): Records with at least 'symbol' and 'name'.
+
+        Returns:
+        - int: Number of records added.
+        """
+        symbols, names, words = [], [], []
+        with self._lock:
+            for record in records:
+                symbol = normalize(record.get("symbol", ""))
+                if not symbol or symbol in self._by_symbol:
+                    continue
+                record_id = len(self.records)
+                self.records.append(dict(record))
+                self._by_symbol[symbol] = record_id
+                name = normalize(record.get("name", ""))
+                symbols.append((symbol, record_id))
+                if name:
+                    names.append((name, record_id))
+                words.extend((word, record_id) for word in set(name.split()))
+                for term in {symbol, *name.split()}:
+                    if len(term) >= 3:
+                        self._term_ids.setdefault(term, set()).add(record_id)
+                        for key in _deletions(term) | {term}:
+                            self._deletes.setdefault(key, set()).add(term)
+            # Sorting an already sorted list plus a few new entries is close to linear
+            for entries, new in ((self._symbols, symbols), (self._names, names), (self._words, words)):
+                entries.extend(new)
+                entries.sort()
+        return len(symbols)
+
+    def _prefix(self, entries, query, limit):
+        start = bisect.bisect_left(entries, (query,))
+        hits = []
+        for term, record_id in entries[start:start + limit]:
+            if not term.startswith(query):
+                break
+            hits.append((term, record_id))
+        return hits
+
+    def _fuzzy(self, query):
+        terms = set(self._deletes.get(query, ()))
+        for key in _deletions(query):
+            terms |= self._deletes.get(key, set())
+        return [(term, record_id) for term in terms for record_id in self._term_ids[term]]
+
+    def search(self, query, limit=10):
+        """
+        Find records matching a ticker or company name, best first.
+
+        Exact tickers rank first, then ticker prefixes, name prefixes, prefixes of any
+        word in the name, and finally fuzzy matches. Shorter matches rank higher within
+        each kind.
+
+        Args:
+        - query (str): Ticker or company name, or the start of one.
+        - limit (int): Maximum number of matches.
+
+        Returns:
+        - list of dict: Matching records, each with a 'score'.
+        """
+        query = normalize(query)
+        if not query:
+            return []
+        scan = max(limit * 20, 100)
+        scores = {}
+
+        def score(kind, term, record_id):
+            value = SCORES[kind] - min(len(term) - len(query), 19)
+            if value > scores.get(record_id, -1):
+                scores[record_id] = value
+
+        with self._lock:
+            for term, record_id in self._prefix(self._symbols, query, scan):
+                score("symbol" if term == query else "symbol_prefix", term, record_id)
+            for term, record_id in self._prefix(self._names, query, scan):
+                score("name_prefix", term, record_id)
+            if " " not in query:
+                for term, record_id in self._prefix(self._words, query, scan):
+                    score("word_prefix", term, record_id)
+            if len(scores) < limit and len(query) >= 3:
+                for term, record_id in self._fuzzy(query):
+                    score("fuzzy", term, record_id)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self.records[item[0]]["symbol"])))
+            return [{**self.records[record_id], "score": value} for record_id, value in ranked[:limit]]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_symbol_index(listing_path=LISTING_PATH, cache=None):
+    """
+    Return the shared symbol index, building it on first use.
+
+    The index is built from every cached SYMBOL_SEARCH response and, if present, the
+    listing file.
+
+    Returns:
+    - SymbolIndex: The shared index.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            index = SymbolIndex()
+            if listing_path and os.path.exists(listing_path):
+                index.add(records_from_listing(listing_path))
+            for payload in (cache or get_response_cache()).payloads("SYMBOL_SEARCH"):
+                index.add(records_from_search(payload))
+            _index = index
+    return _index
+
+def search_symbols(keywords, limit=10, remote=True):
+    """
+    Search symbols locally, calling SYMBOL_SEARCH only when nothing matches.
+
+    Remote matches are added to the index so the same search is answered locally next time.
+
+    Args:
+    - keywords (str): Ticker or company name, or the start of one.
+    - limit (int): Maximum number of matches.
+    - remote (bool): Whether to fall back to the remote search on a miss.
+
+    Returns:
+    - list of dict: Matching records with symbol, name, type, region and score.
+    """
+    index = get_symbol_index()
+    matches = index.search(keywords, limit)
+    if matches or not remote or not normalize(keywords):
+        return matches
+    payload = search_symbol(keywords)
+    if is_error_response(payload):
+        return []
+    index.add(records_from_search(payload))
+    return index.search(keywords, limit)